@@ -4,10 +4,24 @@ Provides rich, context-specific data extraction without rigid schema constraints
 """
 
 import os
-import json
+import io
+import time
+import asyncio
 import logging
-from typing import Dict, List, Optional
-from openai import OpenAI
+import threading
+import weakref
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Dict, List, Optional, Set, Tuple
+import ahocorasick
+import httpx
+import ijson
+import orjson
+from aiolimiter import AsyncLimiter
+from diskcache import Cache
+from openai import AsyncOpenAI, OpenAI, RateLimitError
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_random_exponential
+from app_logging import write_debug_file
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +30,58 @@ OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 OPENROUTER_MODEL = "openai/gpt-4o-mini-search-preview"
 OPENROUTER_REFERER = "Prism"
 OPENROUTER_TITLE = "Prism API"
+LLM_TEMPERATURE = 0.1  # Low temperature for consistent output
+
+# Output token ceilings per chunk: five retail platforms fit comfortably in 8K
+LLM_MAX_TOK_RETAIL = int(os.getenv("LLM_MAX_TOK_RETAIL", "8192"))
+LLM_MAX_TOK_SUMMARY = int(os.getenv("LLM_MAX_TOK_SUMMARY", "12288"))
+
+# LLM request pool: cap in-flight calls and smooth request rate so bulk
+# ingestion does not trip OpenRouter rate limits
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "10"))
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))
+LLM_RATE_LIMIT_ATTEMPTS = 5
+# (rate limiter, semaphore) per event loop: both bind to the first loop that
+# waits on them, so one module-level pair breaks across asyncio.run calls
+_llm_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Tuple[AsyncLimiter, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+
+
+def _get_llm_pool() -> Tuple[AsyncLimiter, asyncio.Semaphore]:
+    """Get or create the running event loop's request rate limiter and concurrency cap."""
+    loop = asyncio.get_running_loop()
+    pool = _llm_pools.get(loop)
+    if pool is None:
+        pool = _llm_pools[loop] = (
+            AsyncLimiter(max_rate=LLM_RPM, time_period=60),
+            asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        )
+    return pool
+
+# Shared HTTP connection pool settings for the OpenAI clients
+LLM_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+LLM_HTTP_TIMEOUT = httpx.Timeout(120.0)
+
+# LLM response cache configuration
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "./cache/llm")
+LLM_CACHE_TTL_SECS = 7 * 86400
+LLM_CACHE_MAX_TEMPERATURE = 0.3  # Above this, completions vary too much to reuse
+
+# Semantic similarity cache (opt-in): retail lookups for near-duplicate
+# product names reuse a prior answer instead of a full generation
+LLM_SEMANTIC_CACHE_DIR = os.getenv("LLM_SEMANTIC_CACHE_DIR", "./cache/semantic")
+LLM_SEMANTIC_THRESHOLD = float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.97"))
+EMBEDDING_BASE_URL = os.getenv("OPENAI_EMBEDDING_BASE_URL", "https://api.openai.com/v1")
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+
+# Batch API Configuration (OpenRouter has no batch endpoint, so bulk backfills
+# go to an OpenAI-compatible provider directly)
+BATCH_BASE_URL = os.getenv("OPENAI_BATCH_BASE_URL", "https://api.openai.com/v1")
+# The real-time search-preview model is not accepted by the Batch API, so
+# batch jobs use a plain chat model (and therefore have no live web search)
+BATCH_MODEL = os.getenv("OPENAI_BATCH_MODEL", "gpt-4o-mini")
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
 
 # Category-specific specifications and aspects
 CATEGORY_SPECS = {
@@ -41,37 +107,75 @@ CATEGORY_SPECS = {
     }
 }
 
+# Comma-joined spec/aspect lists interpolated into the category prompts
+CATEGORY_PROMPT_FRAGMENTS = {
+    category: {
+        "specs4": ", ".join(info["specs"][:4]),
+        "specs3": ", ".join(info["specs"][:3]),
+        "aspects": ", ".join(info["aspects"]),
+        "aspects4": ", ".join(info["aspects"][:4])
+    }
+    for category, info in CATEGORY_SPECS.items()
+}
+
+# Category keywords used for detection
+CATEGORY_KEYWORDS = {
+    "Fragrance": ["perfume", "eau de parfum", "eau de toilette", "cologne", "fragrance", "scent"],
+    "Makeup": ["foundation", "lipstick", "mascara", "eyeshadow", "blush", "concealer", "powder", "makeup", "cosmetic"],
+    "Skincare": ["serum", "moisturizer", "cleanser", "cream", "lotion", "essence", "toner", "treatment", "skincare"],
+    "Tools": ["brush", "sponge", "curler", "applicator", "tool", "device", "blender"]
+}
+
+def _build_category_automaton() -> ahocorasick.Automaton:
+    """Compile every category keyword into a single Aho-Corasick automaton."""
+    automaton = ahocorasick.Automaton()
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        for keyword in keywords:
+            keyword = keyword.casefold()
+            automaton.add_word(keyword, (category, keyword))
+    automaton.make_automaton()
+    return automaton
+
+_CATEGORY_AUTOMATON = _build_category_automaton()
+
+# Declaration order of CATEGORY_KEYWORDS decides ties, as max() over the dict did
+_CATEGORY_RANK = {category: rank for rank, category in enumerate(CATEGORY_KEYWORDS)}
+
+@lru_cache(maxsize=4096)
 def detect_product_category(product_name: str, brand: str = "", description: str = "") -> str:
     """
     Detect product category using intelligent analysis.
-    """
-    product_text = f"{product_name} {brand} {description}".lower()
     
-    # Category keywords with weights
-    category_indicators = {
-        "Fragrance": ["perfume", "eau de parfum", "eau de toilette", "cologne", "fragrance", "scent"],
-        "Makeup": ["foundation", "lipstick", "mascara", "eyeshadow", "blush", "concealer", "powder", "makeup", "cosmetic"],
-        "Skincare": ["serum", "moisturizer", "cleanser", "cream", "lotion", "essence", "toner", "treatment", "skincare"],
-        "Tools": ["brush", "sponge", "curler", "applicator", "tool", "device", "blender"]
-    }
+    Scans the product text once with a precompiled automaton; each keyword
+    contributes at most one point to its category, however often it occurs.
+    The leading category is tracked during the scan, so no extra passes over
+    the scores are needed.
+    """
+    product_text = f"{product_name} {brand} {description}"
+    if not product_text.islower():
+        product_text = product_text.casefold()
     
-    scores = {}
-    for category, keywords in category_indicators.items():
-        scores[category] = sum(1 for keyword in keywords if keyword in product_text)
+    seen = set()
+    scores: Dict[str, int] = {}
+    best_category, best_score = "Makeup", 0
+    for _, match in _CATEGORY_AUTOMATON.iter(product_text):
+        if match in seen:
+            continue
+        seen.add(match)
+        category = match[0]
+        score = scores[category] = scores.get(category, 0) + 1
+        if score > best_score or (score == best_score and _CATEGORY_RANK[category] < _CATEGORY_RANK[best_category]):
+            best_category, best_score = category, score
     
-    # Return category with highest score, default to Makeup if tie
-    detected = max(scores, key=scores.get) if max(scores.values()) > 0 else "Makeup"
-    logger.info(f"Category detection for '{product_name}': {detected} (scores: {scores})")
-    return detected
+    logger.info(f"Category detection for '{product_name}': {best_category} (scores: {scores})")
+    return best_category
 
-def fetch_adaptive_retail_chunk(product_name: str, category: str) -> Dict:
-    """
-    Fetch retail platform data with category-aware specifications.
-    """
+def _build_retail_system(category: str) -> str:
+    """Render the retail chunk system prompt for a category."""
     category_info = CATEGORY_SPECS.get(category, CATEGORY_SPECS["Makeup"])
-    specs_examples = ", ".join(category_info["specs"][:4])
+    specs_examples = CATEGORY_PROMPT_FRAGMENTS.get(category, CATEGORY_PROMPT_FRAGMENTS["Makeup"])["specs4"]
     
-    system_prompt = f"""You are a beauty product retail specialist. Extract ONLY retail platform data for {category_info['description']} products.
+    return f"""You are a beauty product retail specialist. Extract ONLY retail platform data for {category_info['description']} products.
 
 CRITICAL: Return ONLY valid JSON. No markdown, no explanations, no code blocks.
 
@@ -107,33 +211,18 @@ REQUIREMENTS:
 - Generate platform summary analyzing {category}-specific sentiment
 - Return complete JSON - all 5 platforms required"""
 
-    user_prompt = f"""Get current retail data for: {product_name}
-
-This is a {category} product. Focus on gathering:
-1. PRICING - Current prices across all retail platforms
-2. RATINGS - Customer ratings and satisfaction scores
-3. REVIEWS - Customer feedback highlighting {category}-specific aspects
-4. AVAILABILITY - Stock status and promotions
-
-Extract {category}-relevant information from customer reviews and ratings."""
-
-    return _make_llm_call(system_prompt, user_prompt, max_tokens=16384)
-
-def fetch_adaptive_summary_chunk(product_name: str, category: str, all_platform_data: Dict) -> Dict:
-    """
-    Generate comprehensive summary with category-specific analysis.
-    """
+def _build_summary_system(category: str) -> str:
+    """Render the summary chunk system prompt for a category."""
     category_info = CATEGORY_SPECS.get(category, CATEGORY_SPECS["Makeup"])
-    aspects = category_info["aspects"]
-    specs = category_info["specs"]
+    fragments = CATEGORY_PROMPT_FRAGMENTS.get(category, CATEGORY_PROMPT_FRAGMENTS["Makeup"])
     
-    system_prompt = f"""You are a beauty product analyst specializing in {category_info['description']} products. Create comprehensive product analysis.
+    return f"""You are a beauty product analyst specializing in {category_info['description']} products. Create comprehensive product analysis.
 
 CRITICAL: Return ONLY valid JSON. No markdown, no explanations, no code blocks.
 
 CATEGORY-SPECIFIC ANALYSIS for {category}:
-- Relevant aspects to score: {', '.join(aspects)}
-- Key specifications to extract: {', '.join(specs[:4])}
+- Relevant aspects to score: {fragments['aspects']}
+- Key specifications to extract: {fragments['specs4']}
 - Ignore aspects not applicable to {category} products
 
 REQUIRED OUTPUT FORMAT - Return ONLY this JSON structure:
@@ -149,7 +238,7 @@ REQUIRED OUTPUT FORMAT - Return ONLY this JSON structure:
     "size": "string",
     "form": "string",
     "category_specific": {{
-      // Add {category}-relevant specs like: {', '.join(specs[:3])}
+      // Add {category}-relevant specs like: {fragments['specs3']}
     }},
     "key_ingredients": ["ingredient1", "ingredient2"],
     "performance_claims": ["claim1", "claim2"],
@@ -178,7 +267,7 @@ REQUIRED OUTPUT FORMAT - Return ONLY this JSON structure:
       "value_for_money": 0.0-1.0,
       "overall_satisfaction": 0.0-1.0,
       "category_aspects": {{
-        // Score only relevant {category} aspects: {', '.join(aspects[:4])}
+        // Score only relevant {category} aspects: {fragments['aspects4']}
       }}
     }}
   }},
@@ -200,22 +289,96 @@ REQUIREMENTS:
 - Provide honest assessment of data completeness
 - Return complete JSON structure"""
 
+# System prompts only depend on the category, so render them once at import
+RETAIL_SYSTEM_PROMPTS = {category: _build_retail_system(category) for category in CATEGORY_SPECS}
+SUMMARY_SYSTEM_PROMPTS = {category: _build_summary_system(category) for category in CATEGORY_SPECS}
+
+def build_adaptive_retail_prompts(product_name: str, category: str) -> Tuple[str, str]:
+    """
+    Build the (system, user) prompts for the category-aware retail chunk.
+    """
+    system_prompt = RETAIL_SYSTEM_PROMPTS.get(category) or _build_retail_system(category)
+
+    user_prompt = f"""Get current retail data for: {product_name}
+
+This is a {category} product. Focus on gathering:
+1. PRICING - Current prices across all retail platforms
+2. RATINGS - Customer ratings and satisfaction scores
+3. REVIEWS - Customer feedback highlighting {category}-specific aspects
+4. AVAILABILITY - Stock status and promotions
+
+Extract {category}-relevant information from customer reviews and ratings."""
+
+    return system_prompt, user_prompt
+
+async def fetch_adaptive_retail_chunk(product_name: str, category: str) -> Dict:
+    """
+    Fetch retail platform data with category-aware specifications.
+    """
+    system_prompt, user_prompt = build_adaptive_retail_prompts(product_name, category)
+    return await _make_llm_call_async(
+        system_prompt, user_prompt, max_tokens=LLM_MAX_TOK_RETAIL, semantic_key=product_name
+    )
+
+def _condense_platform_data(all_platform_data: Dict, max_chars: int = 4000) -> str:
+    """
+    Serialize collected platform data compactly for the summary prompt.
+    
+    Rather than slicing a pretty-printed dump (which wastes tokens on
+    whitespace and can hand the model broken JSON), keep at most two reviews
+    per platform, drop rating breakdowns and serialize without whitespace.
+    If that is still over max_chars, platforms with the fewest reviews are
+    dropped first, so the result is always valid JSON.
+    """
+    condensed = {}
+    platform_sizes = []
+    for source, source_data in all_platform_data.items():
+        platforms = source_data.get("platforms", {}) if isinstance(source_data, dict) else {}
+        condensed_platforms = {}
+        for platform_name, platform_data in platforms.items():
+            review_count = 0
+            if isinstance(platform_data, dict):
+                platform_data = dict(platform_data)
+                if isinstance(platform_data.get("reviews"), list):
+                    review_count = len(platform_data["reviews"])
+                    platform_data["reviews"] = platform_data["reviews"][:2]
+                if isinstance(platform_data.get("rating"), dict):
+                    platform_data["rating"] = {k: v for k, v in platform_data["rating"].items() if k != "breakdown"}
+            platform_sizes.append((review_count, source, platform_name))
+            condensed_platforms[platform_name] = platform_data
+        condensed[source] = {"platforms": condensed_platforms}
+
+    serialized = orjson.dumps(condensed, default=str).decode("utf-8")
+    for _, source, platform_name in sorted(platform_sizes, key=lambda size: size[0]):
+        if len(serialized) <= max_chars:
+            break
+        del condensed[source]["platforms"][platform_name]
+        serialized = orjson.dumps(condensed, default=str).decode("utf-8")
+
+    return serialized
+
+async def fetch_adaptive_summary_chunk(product_name: str, category: str, all_platform_data: Dict) -> Dict:
+    """
+    Generate comprehensive summary with category-specific analysis.
+    """
+    system_prompt = SUMMARY_SYSTEM_PROMPTS.get(category) or _build_summary_system(category)
+    fragments = CATEGORY_PROMPT_FRAGMENTS.get(category, CATEGORY_PROMPT_FRAGMENTS["Makeup"])
+
     # Prepare condensed data for analysis
     data_summary = {
         "retail_platforms": len(all_platform_data.get("retail", {}).get("platforms", {})),
         "editorial_data": bool(all_platform_data.get("editorial", {}).get("platforms", {}).get("editorial")),
         "influencer_data": len(all_platform_data.get("influencer", {}).get("platforms", {})),
-        "category": category,
-        "sample_data": str(all_platform_data)[:3000] + "..."
+        "category": category
     }
 
     user_prompt = f"""Analyze all collected data for {product_name} ({category}) and generate comprehensive, category-aware analysis.
 
 PLATFORM DATA COLLECTED:
-{json.dumps(data_summary, indent=2)}
+{orjson.dumps(data_summary).decode("utf-8")}
 
 FULL DATA FOR ANALYSIS:
-{json.dumps(all_platform_data, indent=2)[:4000]}...
+{_condense_platform_data(all_platform_data)}
 
 Generate {category}-specific analysis:
 1. PRODUCT IDENTITY - name, brand, category, subcategory, image URLs
@@ -225,16 +388,19 @@ Generate {category}-specific analysis:
    - {category}-specific usage recommendations
    - Platform consensus tailored to {category}
 4. ASPECT SCORES - Rate only {category}-relevant aspects:
-   {', '.join(aspects)}
+   {fragments['aspects']}
 5. DATA QUALITY ASSESSMENT - Honest evaluation of data completeness
 
 Return complete JSON with all analysis sections optimized for {category} products."""
 
-    return _make_llm_call(system_prompt, user_prompt, max_tokens=16384)
+    return await _make_llm_call_async(system_prompt, user_prompt, max_tokens=LLM_MAX_TOK_SUMMARY)
 
-def fetch_product_snapshot_adaptive(product_name: str, brand: str = "", description: str = "") -> Dict:
+async def fetch_product_snapshot_adaptive_async(product_name: str, brand: str = "", description: str = "") -> Dict:
     """
     Main function to fetch complete product data using adaptive, category-aware approach.
+    
+    The retail, editorial and influencer chunks are independent, so they are
+    fetched concurrently; only the summary call waits on all three.
     """
     logger.info(f"Starting adaptive product ingestion for: {product_name}")
     
@@ -243,15 +409,26 @@ def fetch_product_snapshot_adaptive(product_name: str, brand: str = "", descript
         category = detect_product_category(product_name, brand, description)
         logger.info(f"Detected category: {category}")
         
-        # Step 2: Collect platform data with category awareness
-        logger.info("Fetching retail platform data...")
-        retail_data = fetch_adaptive_retail_chunk(product_name, category)
-        
-        logger.info("Fetching brand and editorial data...")
-        editorial_data = fetch_brand_editorial_chunk(product_name)  # Reuse existing
+        # Step 2: Collect platform data with category awareness (concurrently)
+        logger.info("Fetching retail, brand/editorial and influencer data concurrently...")
+        results = await asyncio.gather(
+            fetch_adaptive_retail_chunk(product_name, category),
+            fetch_brand_editorial_chunk(product_name),  # Reuse existing
+            fetch_influencer_chunk(product_name),  # Reuse existing
+            return_exceptions=True
+        )
         
-        logger.info("Fetching influencer data...")
-        influencer_data = fetch_influencer_chunk(product_name)  # Reuse existing
+        # A failed chunk degrades to empty data; only fail if nothing came back
+        chunk_data = []
+        for chunk_name, result in zip(("retail", "editorial", "influencer"), results):
+            if isinstance(result, BaseException):
+                logger.error(f"Adaptive {chunk_name} chunk failed: {str(result)}")
+                result = {}
+            chunk_data.append(result)
+        if all(isinstance(result, BaseException) for result in results):
+            raise results[0]
+
+        retail_data, editorial_data, influencer_data = chunk_data
         
         # Step 3: Combine all platform data
         all_platform_data = {
@@ -262,7 +439,7 @@ def fetch_product_snapshot_adaptive(product_name: str, brand: str = "", descript
         
         # Step 4: Generate adaptive summary with category-specific analysis
         logger.info(f"Generating {category}-specific comprehensive analysis...")
-        summary_data = fetch_adaptive_summary_chunk(product_name, category, all_platform_data)
+        summary_data = await fetch_adaptive_summary_chunk(product_name, category, all_platform_data)
         
         # Step 5: Merge all data into final snapshot
         final_snapshot = {
@@ -287,78 +464,493 @@ def fetch_product_snapshot_adaptive(product_name: str, brand: str = "", descript
         logger.error(f"Adaptive ingestion failed for {product_name}: {str(e)}")
         raise
 
+def fetch_product_snapshot_adaptive(product_name: str, brand: str = "", description: str = "") -> Dict:
+    """
+    Synchronous wrapper around fetch_product_snapshot_adaptive_async for callers
+    that are not running inside an event loop.
+    """
+    async def run() -> Dict:
+        try:
+            return await fetch_product_snapshot_adaptive_async(product_name, brand, description)
+        finally:
+            await close_clients()
+    return asyncio.run(run())
+
+def write_snapshot_jsonl(path: str, snapshot: Dict) -> None:
+    """Append one snapshot to a JSON-Lines file, one product per line."""
+    with open(path, "ab") as f:
+        f.write(orjson.dumps(snapshot, default=str) + b"\n")
+
+def load_completed_product_ids(path: str) -> Set[str]:
+    """
+    Scan a snapshot JSON-Lines file for product IDs that are already done.
+    
+    A line cut short by a crash is skipped (so that product is fetched again)
+    and trimmed from the file so the next append starts on a fresh line.
+    """
+    completed: Set[str] = set()
+    if not os.path.exists(path):
+        return completed
+    complete_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            complete_bytes += len(line)
+            try:
+                completed.add(str(orjson.loads(line)["product_id"]))
+            except (orjson.JSONDecodeError, KeyError, TypeError):
+                continue
+    if complete_bytes < os.path.getsize(path):
+        os.truncate(path, complete_bytes)
+    return completed
+
+async def fetch_catalogue_snapshots_jsonl(products: List[Dict], path: str) -> int:
+    """
+    Fetch adaptive snapshots for many products, checkpointing each to JSON-Lines.
+    
+    Each snapshot is written as soon as it is ready instead of being held in
+    memory, and products already present in the file are skipped, so an
+    interrupted run resumes where it stopped. Failed products are logged and
+    left out of the file so the next run retries them.
+    
+    Args:
+        products: Product rows with 'id', 'name' and optional 'brand'/'description'
+        path: JSON-Lines output file
+        
+    Returns:
+        Number of snapshots written by this run
+    """
+    completed = load_completed_product_ids(path)
+    written = 0
+    for product in products:
+        product_id = str(product["id"])
+        if product_id in completed:
+            continue
+        try:
+            snapshot = await fetch_product_snapshot_adaptive_async(
+                product["name"], product.get("brand") or "", product.get("description") or ""
+            )
+        except Exception as e:
+            logger.error(f"Snapshot failed for product {product_id}: {str(e)}")
+            continue
+        write_snapshot_jsonl(path, {"product_id": product_id, **snapshot})
+        written += 1
+    
+    logger.info(f"Wrote {written} snapshots to {path} ({len(completed)} already complete)")
+    return written
+
 # Reuse existing helper functions
-def fetch_brand_editorial_chunk(product_name: str) -> Dict:
+async def fetch_brand_editorial_chunk(product_name: str) -> Dict:
     """Reuse existing brand editorial chunk function"""
     # Import from existing chunked_llama module
     from chunked_llama import fetch_brand_editorial_chunk as original_fetch
-    return original_fetch(product_name)
+    return await original_fetch(product_name)
 
-def fetch_influencer_chunk(product_name: str) -> Dict:
+async def fetch_influencer_chunk(product_name: str) -> Dict:
     """Reuse existing influencer chunk function"""
     from chunked_llama import fetch_influencer_chunk as original_fetch
-    return original_fetch(product_name)
+    return await original_fetch(product_name)
+
+# Global response cache instance, created on first use
+_llm_cache = None
+
+def get_llm_cache() -> Optional[Cache]:
+    """Get or create the on-disk LLM response cache, or None when caching is disabled."""
+    global _llm_cache
+    if os.getenv("LLM_CACHE_DISABLE") == "1" or LLM_TEMPERATURE > LLM_CACHE_MAX_TEMPERATURE:
+        return None
+    if _llm_cache is None:
+        _llm_cache = Cache(LLM_CACHE_DIR)
+    return _llm_cache
 
-def _make_llm_call(system_prompt: str, user_prompt: str, max_tokens: int = 16384) -> Dict:
+# Global semantic cache instance, created on first use
+_semantic_cache = None
+
+def get_semantic_cache():
+    """Get or create the semantic similarity cache, or None unless LLM_SEMANTIC_CACHE=1."""
+    global _semantic_cache
+    if os.getenv("LLM_SEMANTIC_CACHE") != "1" or LLM_TEMPERATURE > LLM_CACHE_MAX_TEMPERATURE:
+        return None
+    if _semantic_cache is None:
+        from semantic_cache import SemanticCache
+        _semantic_cache = SemanticCache(LLM_SEMANTIC_CACHE_DIR, EMBEDDING_DIM, LLM_SEMANTIC_THRESHOLD)
+    return _semantic_cache
+
+# Async clients, one per event loop (httpx connections cannot move between
+# loops), created on first use and reused so calls share keep-alive
+# connections instead of paying a TLS handshake each
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_embedding_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+_batch_client = None
+
+def _get_loop_client(clients: "weakref.WeakKeyDictionary", env_var: str, base_url: str) -> AsyncOpenAI:
+    """Get or create the running event loop's client in `clients`."""
+    loop = asyncio.get_running_loop()
+    client = clients.get(loop)
+    if client is None:
+        with _client_lock:
+            client = clients.get(loop)
+            if client is None:
+                api_key = os.getenv(env_var)
+                if not api_key:
+                    raise ValueError(f"{env_var} environment variable is required")
+                client = clients[loop] = AsyncOpenAI(
+                    base_url=base_url,
+                    api_key=api_key,
+                    http_client=httpx.AsyncClient(limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT)
+                )
+    return client
+
+def _get_async_client() -> AsyncOpenAI:
+    """Get or create the async OpenRouter client for the running event loop."""
+    return _get_loop_client(_async_clients, "OPENROUTER_API_KEY", OPENROUTER_BASE_URL)
+
+def _get_embedding_client() -> AsyncOpenAI:
+    """Get or create the async OpenAI client used for embeddings on the running event loop."""
+    return _get_loop_client(_embedding_clients, "OPENAI_API_KEY", EMBEDDING_BASE_URL)
+
+async def close_clients() -> None:
     """
-    Make a focused LLM call with comprehensive error handling
+    Close the running event loop's clients, if any were created.
+    
+    Callers that run the async API on their own loop (e.g. asyncio.run over
+    fetch_catalogue_snapshots_jsonl) should await this before the loop closes.
     """
+    loop = asyncio.get_running_loop()
+    for clients in (_async_clients, _embedding_clients):
+        client = clients.pop(loop, None)
+        if client is not None:
+            await client.close()
+
+async def _embed(text: str) -> Optional[List[float]]:
+    """Embed text for the semantic cache; None on failure so the LLM call still proceeds."""
     try:
-        # Get API key
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
-            raise ValueError("OPENROUTER_API_KEY environment variable is required")
+        response = await _get_embedding_client().embeddings.create(model=EMBEDDING_MODEL, input=text)
+        return response.data[0].embedding
+    except Exception as e:
+        logger.warning(f"Semantic cache embedding failed: {str(e)}")
+        return None
 
-        # Create OpenAI client
-        client = OpenAI(
-            base_url=OPENROUTER_BASE_URL,
-            api_key=api_key,
-        )
-        
-        # Make API call
-        response = client.chat.completions.create(
-            model=OPENROUTER_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=max_tokens,
-            temperature=0.1,  # Low temperature for consistent output
-            extra_headers={
-                "HTTP-Referer": OPENROUTER_REFERER,
-                "X-Title": OPENROUTER_TITLE,
-            }
-        )
+def _cache_key(system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+    """Key a completion on model + prompts + max_tokens so model upgrades invalidate it."""
+    return blake2b(
+        (OPENROUTER_MODEL + system_prompt + user_prompt + str(max_tokens)).encode(),
+        digest_size=16
+    ).hexdigest()
+
+async def _stream_completion(client: AsyncOpenAI, system_prompt: str, user_prompt: str,
+                             max_tokens: int) -> Tuple[str, Optional[Dict], Optional[int]]:
+    """
+    Stream a chat completion and parse its JSON while it is still arriving.
+    
+    Each delta is fed to an incremental ijson parser that emits top-level
+    sections ("platforms", "specifications", ...) as soon as they close, so
+    parsing overlaps the network transfer instead of starting after the last
+    token. If the model strays from pure JSON (markdown fences, truncation),
+    incremental parsing is abandoned and the caller falls back to the repair
+    pipeline on the raw text.
+    
+    Returns:
+        (raw_output, parsed sections or None, total tokens used if reported)
+    """
+    raw_output = io.StringIO()
+    sections: Dict = {}
+    events = ijson.sendable_list()
+    parser = ijson.kvitems_coro(events, "", use_float=True)
+    tokens_used = None
+
+    stream = await client.chat.completions.create(
+        model=OPENROUTER_MODEL,
+        messages=[
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        max_tokens=max_tokens,
+        temperature=LLM_TEMPERATURE,
+        response_format={"type": "json_object"},
+        stream=True,
+        stream_options={"include_usage": True},
+        extra_headers={
+            "HTTP-Referer": OPENROUTER_REFERER,
+            "X-Title": OPENROUTER_TITLE,
+        }
+    )
+    async for chunk in stream:
+        if chunk.usage:
+            tokens_used = chunk.usage.total_tokens
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            continue
+        delta = chunk.choices[0].delta.content
+        raw_output.write(delta)
+        if parser is None:
+            continue
+        try:
+            parser.send(delta.encode("utf-8"))
+        except ijson.JSONError:
+            parser = None
+            continue
+        for key, value in events:
+            sections[key] = value
+        del events[:]
+
+    if parser is not None:
+        try:
+            parser.close()
+            for key, value in events:
+                sections[key] = value
+        except ijson.JSONError:
+            parser = None
+
+    return raw_output.getvalue(), (sections if parser is not None else None), tokens_used
+
+async def _make_llm_call_async(system_prompt: str, user_prompt: str, max_tokens: int = 16384,
+                               semantic_key: Optional[str] = None) -> Dict:
+    """
+    Make a focused LLM call with comprehensive error handling.
+    
+    Parsed responses are cached on disk for LLM_CACHE_TTL_SECS, so re-ingesting
+    the same prompt skips the API call entirely. Cache reads and writes are
+    blocking file I/O and run in worker threads. When semantic_key is given
+    (e.g. the product name) and the semantic cache is enabled, a prior response
+    for a near-identical key under the same system prompt is reused as well.
+    """
+    try:
+        cache = get_llm_cache()
+        cache_key = _cache_key(system_prompt, user_prompt, max_tokens)
+        if cache is not None:
+            cached_data = await asyncio.to_thread(cache.get, cache_key)
+            if cached_data is not None:
+                logger.info("Adaptive LLM cache hit", extra={"cache_key": cache_key, "max_tokens": max_tokens})
+                return cached_data
+
+        semantic_cache = get_semantic_cache() if semantic_key else None
+        embedding = None
+        if semantic_cache is not None:
+            # Embed only the distinguishing key: the templated user prompt is
+            # mostly boilerplate and would make unrelated products look alike
+            namespace = _cache_key(system_prompt, "", max_tokens)
+            embedding = await _embed(semantic_key)
+            if embedding is not None:
+                cached_data = await asyncio.to_thread(semantic_cache.lookup, namespace, embedding)
+                if cached_data is not None:
+                    return cached_data
+
+        client = _get_async_client()
+        rate_limiter, semaphore = _get_llm_pool()
         
-        raw_output = response.choices[0].message.content
+        # Make API call through the bounded, rate-limited pool; back off with
+        # jitter if the provider still answers 429
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception_type(RateLimitError),
+            stop=stop_after_attempt(LLM_RATE_LIMIT_ATTEMPTS),
+            wait=wait_random_exponential(min=1, max=30),
+            reraise=True
+        ):
+            with attempt:
+                async with rate_limiter, semaphore:
+                    raw_output, parsed_data, tokens_used = await _stream_completion(
+                        client, system_prompt, user_prompt, max_tokens
+                    )
         
         # Log success
         logger.info(f"Adaptive LLM call successful", extra={
             "model": OPENROUTER_MODEL,
-            "tokens_used": response.usage.total_tokens if response.usage else None,
+            "tokens_used": tokens_used,
             "max_tokens": max_tokens,
             "output_length": len(raw_output),
             "prompt_type": "adaptive_category_aware"
         })
         
-        # Parse JSON response using existing repair utilities
-        from json_repair import safe_json_parse
-        parsed_data = safe_json_parse(raw_output, max_bytes=50000)
+        if not parsed_data:
+            # Streamed output was not clean JSON; use existing repair utilities
+            from json_repair import safe_json_parse
+            parsed_data = safe_json_parse(raw_output, max_bytes=50000)
         
         if not parsed_data:
-            # Log the raw output for debugging
-            debug_file = f"/tmp/failed_adaptive_chunk_{max_tokens}.json"
-            try:
-                with open(debug_file, 'w') as f:
-                    f.write(raw_output)
-                logger.error(f"Raw LLM output saved to {debug_file}")
-            except:
-                pass
+            # Save the raw output for debugging (written in the background)
+            write_debug_file(
+                f"/tmp/failed_adaptive_chunk_{max_tokens}.json",
+                raw_output.encode("utf-8"),
+                max_tokens=max_tokens,
+                output_length=len(raw_output)
+            )
             
             raise ValueError(f"Failed to parse JSON response from adaptive LLM chunk")
         
+        if cache is not None:
+            await asyncio.to_thread(cache.set, cache_key, parsed_data, expire=LLM_CACHE_TTL_SECS)
+        if embedding is not None:
+            await asyncio.to_thread(semantic_cache.add, namespace, embedding, parsed_data)
+        
         return parsed_data
         
     except Exception as e:
         logger.error(f"Adaptive LLM call failed: {str(e)}")
         raise
+
+def _get_batch_client() -> OpenAI:
+    """Get or create the shared OpenAI client used for Batch API submissions."""
+    global _batch_client
+    if _batch_client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable is required for batch ingestion")
+        _batch_client = OpenAI(
+            base_url=BATCH_BASE_URL,
+            api_key=api_key,
+            http_client=httpx.Client(limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT)
+        )
+    return _batch_client
+
+def _build_batch_prompts(product: Dict) -> Dict[str, Tuple[str, str]]:
+    """Build the (system, user) prompts for every independent chunk of a product."""
+    from chunked_llama import build_brand_editorial_prompts, build_influencer_prompts
+
+    product_name = product["name"]
+    category = detect_product_category(product_name, product.get("brand") or "", product.get("description") or "")
+    return {
+        "retail": build_adaptive_retail_prompts(product_name, category),
+        "editorial": build_brand_editorial_prompts(product_name),
+        "influencer": build_influencer_prompts(product_name),
+    }
+
+def _batch_max_tokens() -> Dict[str, int]:
+    """Output token ceiling per chunk type, matching the real-time calls."""
+    from chunked_llama import CHUNK_MAX_TOKENS_EDITORIAL, CHUNK_MAX_TOKENS_INFLUENCER
+
+    return {
+        "retail": LLM_MAX_TOK_RETAIL,
+        "editorial": CHUNK_MAX_TOKENS_EDITORIAL,
+        "influencer": CHUNK_MAX_TOKENS_INFLUENCER,
+    }
+
+def fetch_product_snapshot_batch(products: List[Dict], max_tokens: Optional[int] = None) -> str:
+    """
+    Submit the independent chunks for many products as one Batch API job.
+    
+    Intended for non-interactive bulk backfills: batch requests are billed at
+    half price and do not count against per-request rate limits, but complete
+    within a 24h window. Interactive single-product requests should keep using
+    fetch_product_snapshot_adaptive.
+    
+    Batch requests have no live web search: the chunk prompts still ask for
+    current retail data, but BATCH_MODEL answers from its training data.
+    Search models reject the temperature field, so it is only sent to other
+    models.
+    
+    Args:
+        products: Product rows with at least "id" and "name" ("brand" and
+            "description" are used for category detection when present)
+        max_tokens: Max tokens for every chunk completion; by default each
+            chunk type uses its own ceiling (LLM_MAX_TOK_RETAIL for retail)
+    
+    Returns:
+        The batch ID, to be passed to poll_batch
+    """
+    chunk_max_tokens = _batch_max_tokens()
+    sampling = {} if "search" in BATCH_MODEL else {"temperature": LLM_TEMPERATURE}
+    lines = []
+    for product in products:
+        for chunk_type, (system_prompt, user_prompt) in _build_batch_prompts(product).items():
+            lines.append(orjson.dumps({
+                "custom_id": f"{product['id']}:{chunk_type}",
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": BATCH_MODEL,
+                    "messages": [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    "max_tokens": max_tokens or chunk_max_tokens[chunk_type],
+                    **sampling
+                }
+            }))
+
+    client = _get_batch_client()
+    batch_file = client.files.create(
+        file=("adaptive_batch.jsonl", io.BytesIO(b"\n".join(lines))),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=BATCH_COMPLETION_WINDOW
+    )
+
+    logger.info(f"Submitted adaptive batch {batch.id}", extra={
+        "products": len(products),
+        "requests": len(lines),
+        "model": BATCH_MODEL
+    })
+    return batch.id
+
+def poll_batch(batch_id: str, poll_interval: float = 60.0,
+               timeout: Optional[float] = None) -> Dict[str, Dict[str, Dict]]:
+    """
+    Wait for a batch submitted by fetch_product_snapshot_batch and collect its results.
+    
+    Args:
+        batch_id: ID returned by fetch_product_snapshot_batch
+        poll_interval: Seconds to sleep between status checks
+        timeout: Overall seconds to wait for the batch to finish (None waits
+            for as long as the batch runs)
+    
+    Returns:
+        Parsed chunk data keyed by product ID, then chunk type. Chunks that
+        errored or could not be parsed are omitted.
+    
+    Raises:
+        RuntimeError: If the batch ends without completing
+        TimeoutError: If the batch is still running after `timeout` seconds
+    """
+    from json_repair import safe_json_parse
+
+    client = _get_batch_client()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status == "completed":
+            break
+        # "cancelling" is a transitional state; wait for it to settle
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise RuntimeError(f"Batch {batch_id} ended with status {batch.status}")
+        logger.info(f"Batch {batch_id} status: {batch.status}")
+        sleep_for = poll_interval
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Batch {batch_id} still {batch.status} after {timeout}s")
+            sleep_for = min(sleep_for, remaining)
+        time.sleep(sleep_for)
+
+    if not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch_id} completed without an output file")
+
+    results: Dict[str, Dict[str, Dict]] = {}
+    for line in client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        record = orjson.loads(line)
+        product_id, chunk_type = record["custom_id"].rsplit(":", 1)
+
+        response = record.get("response") or {}
+        if record.get("error") or response.get("status_code") != 200:
+            logger.error(f"Batch request {record['custom_id']} failed: {record.get('error')}")
+            continue
+
+        raw_output = response["body"]["choices"][0]["message"]["content"]
+        parsed_data = safe_json_parse(raw_output, max_bytes=50000)
+        if not parsed_data:
+            logger.error(f"Failed to parse JSON for batch request {record['custom_id']}")
+            continue
+
+        results.setdefault(product_id, {})[chunk_type] = parsed_data
+
+    logger.info(f"Collected batch {batch_id} results", extra={
+        "products": len(results),
+        "chunks": sum(len(chunks) for chunks in results.values())
+    })
+    return results
@@ -3,29 +3,48 @@ Structured logging configuration for the Prism ingestion service.
 Provides JSON-formatted logs for production and human-readable logs for development.
 """
 
-import json
+import atexit
 import logging
 import logging.handlers
 import os
+import queue
 import sys
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+import orjson
+
+
+class StructuredLogRecord(logging.LogRecord):
+    """
+    LogRecord with empty defaults for the structured request fields.
+    
+    Defaults live on the class rather than the instance so that values passed
+    via ``extra=`` can still be set by Logger.makeRecord.
+    """
+    path = ""
+    method = ""
+    status = ""
+    dur_ms = ""
+    product_id = ""
+
 
 class JSONFormatter(logging.Formatter):
     """Custom formatter that outputs structured JSON logs."""
     
     def format(self, record: logging.LogRecord) -> str:
         log_entry = {
-            "ts": datetime.utcnow().isoformat() + "Z",
+            "ts": self.format_timestamp(record),
             "level": record.levelname,
             "msg": record.getMessage(),
-            "path": getattr(record, "path", ""),
-            "method": getattr(record, "method", ""),
-            "status": getattr(record, "status", ""),
-            "dur_ms": getattr(record, "dur_ms", ""),
-            "product_id": getattr(record, "product_id", ""),
+            "path": record.path,
+            "method": record.method,
+            "status": record.status,
+            "dur_ms": record.dur_ms,
+            "product_id": record.product_id,
             "logger": record.name,
         }
         
@@ -33,13 +52,49 @@ class JSONFormatter(logging.Formatter):
         if record.exc_info:
             log_entry["exception"] = self.formatException(record.exc_info)
             
-        return json.dumps(log_entry, ensure_ascii=False)
+        return orjson.dumps(log_entry, default=str).decode("utf-8")
+
+    @staticmethod
+    def format_timestamp(record: logging.LogRecord) -> str:
+        """Format the record's creation time as ISO-8601 UTC with milliseconds."""
+        return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z"
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that enqueues the record untouched.
+    
+    The stock prepare() formats the message and traceback on the calling thread
+    and clears exc_info, which would leave JSONFormatter without an "exception"
+    key. Formatting is left to the listener's handlers instead.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+# Background listener that formats and writes queued records
+_queue_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def _stop_queue_listener() -> None:
+    """Flush pending records and stop the background listener, if running."""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        _queue_listener = None
+
+
+atexit.register(_stop_queue_listener)
 
 
 def configure_logging(level: str = "INFO", log_dir: str = "./logs") -> None:
     """
     Configure structured logging for the application.
     
+    Records are handed to a queue on the calling thread; a QueueListener thread
+    does the formatting and console/file I/O, so logging never blocks a request.
+    
     Args:
         level: Logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
         log_dir: Directory to store log files
@@ -52,9 +107,14 @@ def configure_logging(level: str = "INFO", log_dir: str = "./logs") -> None:
     root_logger = logging.getLogger()
     root_logger.setLevel(getattr(logging, level.upper()))
     
-    # Clear existing handlers
+    # Clear existing handlers (and stop a listener from a previous call)
+    global _queue_listener
+    _stop_queue_listener()
     root_logger.handlers.clear()
     
+    # Every record carries the structured fields, so the formatter can read them directly
+    logging.setLogRecordFactory(StructuredLogRecord)
+    
     # Console handler (human-readable for development)
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(getattr(logging, level.upper()))
@@ -63,7 +123,6 @@ def configure_logging(level: str = "INFO", log_dir: str = "./logs") -> None:
         datefmt="%Y-%m-%d %H:%M:%S"
     )
     console_handler.setFormatter(console_formatter)
-    root_logger.addHandler(console_handler)
     
     # File handler (JSON format for production)
     file_handler = logging.handlers.TimedRotatingFileHandler(
@@ -75,7 +134,14 @@ def configure_logging(level: str = "INFO", log_dir: str = "./logs") -> None:
     )
     file_handler.setLevel(getattr(logging, level.upper()))
     file_handler.setFormatter(JSONFormatter())
-    root_logger.addHandler(file_handler)
+    
+    # Queue handler on the root logger; the listener feeds the real handlers
+    log_queue = queue.Queue(-1)
+    root_logger.addHandler(_DeferredQueueHandler(log_queue))
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
     
     # Configure specific loggers
     logging.getLogger("uvicorn").setLevel(logging.INFO)
@@ -89,6 +155,7 @@ def configure_logging(level: str = "INFO", log_dir: str = "./logs") -> None:
         "log_dir": str(log_path.absolute()),
         "console_handler": True,
         "file_handler": True,
+        "queue_listener": True,
         "json_format": True
     })
 
@@ -112,8 +179,10 @@ def log_request(
     """
     logger = logging.getLogger("request")
     level = logging.INFO if status_code < 400 else logging.WARNING
+    if not logger.isEnabledFor(level):
+        return
     
-    logger.log(level, f"{method} {path} - {status_code}", extra={
+    logger.log(level, "%s %s - %d", method, path, status_code, extra={
         "path": path,
         "method": method,
         "status": status_code,
@@ -125,7 +194,9 @@ def log_request(
 def log_ingestion_start(product_id: int, product_name: str) -> None:
     """Log the start of product ingestion."""
     logger = logging.getLogger("ingestion")
-    logger.info(f"Starting ingestion for product {product_id}: {product_name}", extra={
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info("Starting ingestion for product %s: %s", product_id, product_name, extra={
         "product_id": product_id,
         "action": "ingestion_start"
     })
@@ -134,7 +205,9 @@ def log_ingestion_start(product_id: int, product_name: str) -> None:
 def log_ingestion_success(product_id: int, duration_ms: float) -> None:
     """Log successful product ingestion."""
     logger = logging.getLogger("ingestion")
-    logger.info(f"Ingestion completed for product {product_id}", extra={
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info("Ingestion completed for product %s", product_id, extra={
         "product_id": product_id,
         "action": "ingestion_success",
         "dur_ms": round(duration_ms, 2)
@@ -144,7 +217,9 @@ def log_ingestion_success(product_id: int, duration_ms: float) -> None:
 def log_ingestion_error(product_id: int, error: str, duration_ms: float) -> None:
     """Log product ingestion error."""
     logger = logging.getLogger("ingestion")
-    logger.error(f"Ingestion failed for product {product_id}: {error}", extra={
+    if not logger.isEnabledFor(logging.ERROR):
+        return
+    logger.error("Ingestion failed for product %s: %s", product_id, error, extra={
         "product_id": product_id,
         "action": "ingestion_error",
         "error": error,
@@ -152,39 +227,66 @@ def log_ingestion_error(product_id: int, error: str, duration_ms: float) -> None
     })
 
 
+# Debug dumps are written off the calling thread so error paths stay fast
+_debug_write_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="dbglog")
+_invalid_output_dir: Optional[Path] = None
+
+
+def _get_invalid_output_dir() -> Path:
+    """Resolve and create the invalid-output directory once per process."""
+    global _invalid_output_dir
+    if _invalid_output_dir is None:
+        _invalid_output_dir = Path(os.getenv("LOG_DIR", "./logs"))
+        _invalid_output_dir.mkdir(parents=True, exist_ok=True)
+    return _invalid_output_dir
+
+
+def _write_debug_file(path: Path, data: bytes, log_extra: Dict[str, Any]) -> None:
+    """Write a debug dump to disk, logging the outcome."""
+    logger = logging.getLogger("invalid_output")
+    try:
+        with open(path, "wb") as f:
+            f.write(data)
+        logger.warning(f"Debug output saved to {path}", extra={**log_extra, "output_file": str(path)})
+    except Exception as e:
+        logger.error(f"Failed to save debug output to {path}: {e}", extra={**log_extra, "error": str(e)})
+
+
+def write_debug_file(path: Path, data: bytes, **log_extra: Any) -> None:
+    """
+    Write a debug dump in the background (fire-and-forget).
+    
+    Args:
+        path: Destination file
+        data: Bytes to write
+        **log_extra: Extra fields for the log record emitted once written
+    """
+    _debug_write_executor.submit(_write_debug_file, Path(path), data, log_extra)
+
+
+def _save_invalid_output(product_id: int, raw_output: str, failed_at: datetime) -> None:
+    """Serialize and write one invalid-output dump (runs on the writer thread)."""
+    filename = _get_invalid_output_dir() / f"invalid_{product_id}_{failed_at.strftime('%Y%m%d_%H%M%S')}.json"
+    
+    payload = orjson.dumps({
+        "product_id": product_id,
+        "timestamp": failed_at.astimezone(timezone.utc).replace(tzinfo=None).isoformat() + "Z",
+        "raw_output": raw_output,
+        "output_length": len(raw_output)
+    }, option=orjson.OPT_INDENT_2, default=str)
+    
+    _write_debug_file(filename, payload, {"product_id": product_id, "output_length": len(raw_output)})
+
+
 def save_invalid_output(product_id: int, raw_output: str) -> None:
     """
     Save invalid LLM output to a file for debugging.
     
+    Serialization and the write both happen on a background thread; this
+    only records the failure time and returns.
+    
     Args:
         product_id: Product ID
         raw_output: Raw output from LLM
     """
-    log_dir = Path(os.getenv("LOG_DIR", "./logs"))
-    log_dir.mkdir(parents=True, exist_ok=True)
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = log_dir / f"invalid_{product_id}_{timestamp}.json"
-    
-    try:
-        with open(filename, "w", encoding="utf-8") as f:
-            json.dump({
-                "product_id": product_id,
-                "timestamp": datetime.utcnow().isoformat() + "Z",
-                "raw_output": raw_output,
-                "output_length": len(raw_output)
-            }, f, indent=2, ensure_ascii=False)
-        
-        logger = logging.getLogger("invalid_output")
-        logger.warning(f"Invalid LLM output saved to {filename}", extra={
-            "product_id": product_id,
-            "filename": str(filename),
-            "output_length": len(raw_output)
-        })
-    except Exception as e:
-        logger = logging.getLogger("invalid_output")
-        logger.error(f"Failed to save invalid output: {e}", extra={
-            "product_id": product_id,
-            "error": str(e)
-        })
-
+    _debug_write_executor.submit(_save_invalid_output, product_id, raw_output, datetime.now().astimezone())
@@ -4,10 +4,28 @@ Breaks down data collection into focused API calls to avoid truncation.
 """
 
 import os
-import json
+import asyncio
+import atexit
 import logging
-from typing import Dict, List, Optional
-from openai import OpenAI
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from functools import lru_cache
+from hashlib import blake2b
+from typing import Any, Coroutine, Dict, List, Optional, Tuple
+import httpx
+import orjson
+from diskcache import Cache
+from openai import AsyncOpenAI, InternalServerError, RateLimitError
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential, wait_random
+
+from app_logging import write_debug_file
+
+try:
+    import uvloop
+except ImportError:  # optional: fall back to the default asyncio loop
+    uvloop = None
 
 logger = logging.getLogger(__name__)
 
@@ -17,13 +35,202 @@ OPENROUTER_MODEL = "openai/gpt-4o-mini-search-preview"
 OPENROUTER_REFERER = "Prism"
 OPENROUTER_TITLE = "Prism API"
 
-def fetch_retail_chunk(product_name: str) -> Dict:
+# Proactive throttling: stay under the provider's request and token ceilings
+# instead of discovering them through 429s
+LLM_RPM = int(os.getenv("LLM_RPM", "500"))
+LLM_TPM = int(os.getenv("LLM_TPM", "200000"))
+LLM_RETRY_ATTEMPTS = 4  # first try + 3 backoff retries on 429/5xx
+
+# Per-request bound for each chunk call (the SDK default is 10 minutes)
+LLM_TIMEOUT_SECS = int(os.getenv("LLM_TIMEOUT_SECS", "120"))
+LLM_HTTP_TIMEOUT = httpx.Timeout(LLM_TIMEOUT_SECS, connect=5.0)
+
+# Output token caps per chunk, sized to the expected JSON (e.g. 5 retail
+# platforms x ~5 short reviews) so they do not waste TPM budget
+CHUNK_MAX_TOKENS_RETAIL = 6144
+CHUNK_MAX_TOKENS_EDITORIAL = 3072
+CHUNK_MAX_TOKENS_INFLUENCER = 4096
+CHUNK_MAX_TOKENS_SUMMARY = 2048  # identity and citations are assembled locally
+CHUNK_MAX_TOKENS_NONRETAIL = CHUNK_MAX_TOKENS_EDITORIAL + CHUNK_MAX_TOKENS_INFLUENCER
+
+# Platforms returned by the combined brand/editorial + influencer chunk
+EDITORIAL_PLATFORMS = ("brand_site", "editorial")
+INFLUENCER_PLATFORMS = ("youtube", "instagram")
+
+# Two-tier response cache: an in-process LRU in front of the on-disk cache
+# shared with adaptive_llama
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", "./cache/llm")
+LLM_CACHE_TTL_SECS = 7 * 86400
+LLM_MEMORY_CACHE_SIZE = 512
+
+# Write /tmp debug dumps of chunk output only when explicitly requested
+DEBUG_DUMP = bool(os.getenv("PRISM_DEBUG_DUMP"))
+
+# Pooled OpenRouter clients, one per event loop: httpx connections cannot move
+# between loops. Sync callers all share the one background loop behind run_sync,
+# so in practice there is one client for it and one for the server's loop
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncOpenAI]" = weakref.WeakKeyDictionary()
+_client_lock = threading.Lock()
+
+
+def _get_client() -> AsyncOpenAI:
+    """Get or create the shared OpenRouter client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        with _client_lock:
+            client = _clients.get(loop)
+            if client is None:
+                api_key = os.getenv("OPENROUTER_API_KEY")
+                if not api_key:
+                    raise ValueError("OPENROUTER_API_KEY environment variable is required")
+                client = AsyncOpenAI(
+                    base_url=OPENROUTER_BASE_URL,
+                    api_key=api_key,
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+                        timeout=LLM_HTTP_TIMEOUT
+                    )
+                )
+                _clients[loop] = client
+    return client
+
+
+async def close_client() -> None:
+    """Close the running event loop's OpenRouter client, if one was created."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+class _TokenBucket:
     """
-    Fetch retail platform data only (Amazon, Sephora, Ulta, Walmart, Nordstrom)
+    Thread-safe token bucket shared by every event loop in the process.
     
-    Returns complete data for 5 retail platforms with guaranteed no truncation.
+    aiolimiter's AsyncLimiter binds to one loop, which split the budget between
+    the server's loop and the sync callers. Here the bookkeeping is under a
+    threading lock and waiting is a plain asyncio.sleep on the caller's loop.
+    Callers reserve capacity up front (the level may go negative), so waiters
+    are served in arrival order.
     """
-    system_prompt = r"""You are a beauty product retail specialist. Extract ONLY retail platform data.
+    
+    def __init__(self, max_rate: float, time_period: float = 60):
+        self.max_rate = max_rate
+        self._rate_per_sec = max_rate / time_period
+        self._level = float(max_rate)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    async def acquire(self, amount: float = 1) -> None:
+        """Wait until `amount` units fit in the bucket, then consume them."""
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(self.max_rate, self._level + (now - self._last) * self._rate_per_sec)
+            self._last = now
+            self._level -= amount
+            wait = -self._level / self._rate_per_sec if self._level < 0 else 0.0
+        if wait:
+            await asyncio.sleep(wait)
+
+
+# Request- and token-rate buckets, shared across event loops
+_request_limiter = _TokenBucket(LLM_RPM)
+_token_limiter = _TokenBucket(LLM_TPM)
+
+
+def _get_limiters() -> Tuple[_TokenBucket, _TokenBucket]:
+    """Get the process-wide (requests/min, tokens/min) limiters."""
+    return _request_limiter, _token_limiter
+
+
+# Cached responses are kept as orjson bytes so every hit hands back a fresh dict
+_memory_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_memory_cache_lock = threading.Lock()
+_disk_cache: Optional[Cache] = None
+
+
+def _cache_enabled() -> bool:
+    return os.getenv("LLM_CACHE_DISABLE") != "1"
+
+
+def _get_disk_cache() -> Cache:
+    """Get or create the on-disk response cache."""
+    global _disk_cache
+    if _disk_cache is None:
+        _disk_cache = Cache(LLM_CACHE_DIR)
+    return _disk_cache
+
+
+@lru_cache(maxsize=32)
+def _system_prompt_digest(system_prompt: str) -> str:
+    """Digest a system prompt once; they are module constants, so repeat lookups hit the cache."""
+    return blake2b(system_prompt.encode(), digest_size=16).hexdigest()
+
+
+@lru_cache(maxsize=32)
+def _system_message(system_prompt: str) -> Dict[str, str]:
+    """Prebuilt system message, shared by every call that uses the same system prompt."""
+    return {"role": "system", "content": system_prompt}
+
+
+def _cache_key(system_prompt: str, user_prompt: str, max_tokens: int) -> str:
+    """Key a completion on prompts + model + max_tokens so model upgrades invalidate it."""
+    return blake2b(
+        (_system_prompt_digest(system_prompt) + user_prompt + OPENROUTER_MODEL + str(max_tokens)).encode(),
+        digest_size=16
+    ).hexdigest()
+
+
+def _remember(key: str, data: bytes) -> None:
+    """Insert into the in-process LRU, evicting the least recently used entry."""
+    with _memory_cache_lock:
+        _memory_cache[key] = data
+        _memory_cache.move_to_end(key)
+        if len(_memory_cache) > LLM_MEMORY_CACHE_SIZE:
+            _memory_cache.popitem(last=False)
+
+
+def _disk_cache_get(key: str) -> Optional[bytes]:
+    """Read serialized response bytes from the on-disk cache."""
+    return _get_disk_cache().get(key)
+
+
+def _disk_cache_set(key: str, data: bytes) -> None:
+    """Write serialized response bytes to the on-disk cache."""
+    _get_disk_cache().set(key, data, expire=LLM_CACHE_TTL_SECS)
+
+
+async def _cache_get(key: str) -> Optional[Dict]:
+    """
+    Look a response up in memory, then on disk (promoting disk hits to memory).
+    
+    The disk tier is blocking SQLite I/O, so it runs in a worker thread.
+    """
+    with _memory_cache_lock:
+        data = _memory_cache.get(key)
+        if data is not None:
+            _memory_cache.move_to_end(key)
+    if data is None:
+        data = await asyncio.to_thread(_disk_cache_get, key)
+        if data is None:
+            return None
+        _remember(key, data)
+    return orjson.loads(data)
+
+
+async def _cache_set(key: str, parsed_data: Dict) -> None:
+    """Store a parsed response in both cache tiers (the disk write in a worker thread)."""
+    data = orjson.dumps(parsed_data)
+    _remember(key, data)
+    await asyncio.to_thread(_disk_cache_set, key, data)
+
+
+def _estimate_tokens(system_prompt: str, user_prompt: str, max_tokens: int) -> int:
+    """Rough token cost of a call: ~4 characters per prompt token plus the output ceiling."""
+    return (len(system_prompt) + len(user_prompt)) // 4 + max_tokens
+
+
+_RETAIL_SYSTEM_PROMPT = r"""You are a beauty product retail specialist. Extract ONLY retail platform data.
 
 CRITICAL: Return ONLY valid JSON. No markdown, no explanations, no code blocks.
 
@@ -62,7 +269,7 @@ REQUIREMENTS:
 - Generate platform summary (≤100 chars) analyzing customer sentiment
 - Return complete JSON - all 5 platforms required"""
 
-    user_prompt = f"""Get current retail data for: {product_name}
+_RETAIL_USER_PROMPT_TEMPLATE = """Get current retail data for: {product_name}
 
 Search these retail platforms:
 1. Amazon.com - pricing, customer reviews, ratings
@@ -79,14 +286,21 @@ For each platform:
 
 Return complete JSON with all 5 retail platforms."""
 
-    return _make_llm_call(system_prompt, user_prompt, max_tokens=16384)
-
 
-def fetch_brand_editorial_chunk(product_name: str) -> Dict:
+async def fetch_retail_chunk(product_name: str) -> Dict:
     """
-    Fetch brand website and editorial content from beauty publications
+    Fetch retail platform data only (Amazon, Sephora, Ulta, Walmart, Nordstrom)
+    
+    Returns complete data for 5 retail platforms with guaranteed no truncation.
     """
-    system_prompt = r"""You are a beauty editorial specialist. Extract brand and editorial publication data.
+    system_prompt = _RETAIL_SYSTEM_PROMPT
+
+    user_prompt = _RETAIL_USER_PROMPT_TEMPLATE.format(product_name=product_name)
+
+    return await _make_llm_call(system_prompt, user_prompt, max_tokens=CHUNK_MAX_TOKENS_RETAIL)
+
+
+_BRAND_EDITORIAL_SYSTEM_PROMPT = r"""You are a beauty editorial specialist. Extract brand and editorial publication data.
 
 CRITICAL: Return ONLY valid JSON. No markdown, no explanations, no code blocks.
 
@@ -120,7 +334,7 @@ REQUIREMENTS:
 - Get official brand pricing and claims
 - Return complete JSON with both sections"""
 
-    user_prompt = f"""Get brand and editorial data for: {product_name}
+_BRAND_EDITORIAL_USER_PROMPT_TEMPLATE = """Get brand and editorial data for: {product_name}
 
 Search for:
 1. BRAND WEBSITE - official product page with pricing, claims, descriptions
@@ -140,14 +354,27 @@ Extract:
 
 Return complete JSON with brand and editorial data."""
 
-    return _make_llm_call(system_prompt, user_prompt, max_tokens=16384)
+
+def build_brand_editorial_prompts(product_name: str) -> Tuple[str, str]:
+    """
+    Build the (system, user) prompts for the brand website + editorial chunk
+    """
+    system_prompt = _BRAND_EDITORIAL_SYSTEM_PROMPT
+
+    user_prompt = _BRAND_EDITORIAL_USER_PROMPT_TEMPLATE.format(product_name=product_name)
+
+    return system_prompt, user_prompt
 
 
-def fetch_influencer_chunk(product_name: str) -> Dict:
+async def fetch_brand_editorial_chunk(product_name: str) -> Dict:
     """
-    Fetch YouTube and Instagram influencer content
+    Fetch brand website and editorial content from beauty publications
     """
-    system_prompt = r"""You are a beauty influencer specialist. Extract influencer content from YouTube and Instagram.
+    system_prompt, user_prompt = build_brand_editorial_prompts(product_name)
+    return await _make_llm_call(system_prompt, user_prompt, max_tokens=CHUNK_MAX_TOKENS_EDITORIAL)
+
+
+_INFLUENCER_SYSTEM_PROMPT = r"""You are a beauty influencer specialist. Extract influencer content from YouTube and Instagram.
 
 CRITICAL: Return ONLY valid JSON. No markdown, no explanations, no code blocks.
 
@@ -193,7 +420,7 @@ REQUIREMENTS:
 - Include 3-5 top reviews per platform
 - Return complete JSON with both platforms"""
 
-    user_prompt = f"""Get influencer content for: {product_name}
+_INFLUENCER_USER_PROMPT_TEMPLATE = """Get influencer content for: {product_name}
 
 Search for reviews from TOP beauty influencers:
 
@@ -223,25 +450,159 @@ Find:
 
 Return complete JSON with YouTube and Instagram data."""
 
-    return _make_llm_call(system_prompt, user_prompt, max_tokens=16384)
 
+def build_influencer_prompts(product_name: str) -> Tuple[str, str]:
+    """
+    Build the (system, user) prompts for the YouTube + Instagram influencer chunk
+    """
+    system_prompt = _INFLUENCER_SYSTEM_PROMPT
+
+    user_prompt = _INFLUENCER_USER_PROMPT_TEMPLATE.format(product_name=product_name)
 
-def fetch_summary_chunk(product_name: str, all_platform_data: Dict) -> Dict:
+    return system_prompt, user_prompt
+
+
+async def fetch_influencer_chunk(product_name: str) -> Dict:
     """
-    Generate comprehensive summaries and analysis from all collected data
+    Fetch YouTube and Instagram influencer content
     """
-    system_prompt = r"""You are a beauty product analysis expert. Generate comprehensive summaries from provided data.
+    system_prompt, user_prompt = build_influencer_prompts(product_name)
+    return await _make_llm_call(system_prompt, user_prompt, max_tokens=CHUNK_MAX_TOKENS_INFLUENCER)
+
+
+_NONRETAIL_SYSTEM_PROMPT = r"""You are a beauty editorial and influencer specialist. Extract brand website, editorial publication and influencer (YouTube + Instagram) data.
+
+CRITICAL: Return ONLY valid JSON. No markdown, no explanations, no code blocks.
+
+REQUIRED OUTPUT FORMAT - Return ONLY this JSON structure:
+{
+  "platforms": {
+    "brand_site": {
+      "url": "https://brand-website.com/product",
+      "price": {"amount": 29.99, "currency": "USD", "unit_price": "29.99/unit", "availability": "in_stock", "promo": "Free shipping"},
+      "rating": {"average": 4.5, "count": 0, "breakdown": {"5": 0, "4": 0, "3": 0, "2": 0, "1": 0}},
+      "reviews": [
+        {"author": "Brand Team", "rating": 5, "title": "Product Claims", "body": "Clinically proven 24hr wear formula", "date": "2024-01-01", "url": "https://brand-website.com/product"}
+      ],
+      "summary": "Brand emphasizes long-wear and skin benefits"
+    },
+    "editorial": {
+      "quotes": [
+        {"outlet": "Allure", "quote": "Best foundation for oily skin this year", "url": "https://allure.com/review-article"},
+        {"outlet": "Vogue", "quote": "Flawless coverage that looks natural", "url": "https://vogue.com/beauty-review"}
+      ],
+      "summary": "Beauty editors praise natural coverage and wear time"
+    },
+    "youtube": {
+      "reviews": [
+        {"creator": "James Charles", "channel": "James Charles", "title": "Testing Viral Foundation", "summary": "Loved the coverage but found it a bit drying", "rating": "8/10", "views": "2.5M", "date": "2024-01-10", "url": "https://youtube.com/watch?v=abc123"}
+      ],
+      "summary": "YouTube creators praise coverage but note drying effect"
+    },
+    "instagram": {
+      "reviews": [
+        {"creator": "Huda Kattan", "handle": "@hudabeauty", "post_type": "Post", "summary": "Obsessed with this foundation! Perfect for my skin tone", "likes": "125K", "date": "2024-01-12", "url": "https://instagram.com/p/abc123"}
+      ],
+      "summary": "Instagram influencers love the shade range and finish"
+    }
+  }
+}
+
+REQUIREMENTS:
+- Search brand's official website for product info, pricing and claims
+- Find editorial reviews from major beauty publications
+- Include 4-6 editorial quotes (≤25 words each)
+- Search YouTube and Instagram for macro influencer (500K+ followers) reviews
+- Include 3-5 top reviews per influencer platform
+- Return complete JSON with all four sections"""
+
+_NONRETAIL_USER_PROMPT_TEMPLATE = """Get brand, editorial and influencer data for: {product_name}
+
+Search for:
+1. BRAND WEBSITE - official product page with pricing, claims, descriptions
+2. EDITORIAL CONTENT - beauty magazine reviews from Allure, Vogue, Elle, Harper's Bazaar, Cosmopolitan, Refinery29, Into The Gloss
+3. YOUTUBE CREATORS - James Charles, NikkieTutorials, Jackie Aina, Hyram, Patrick Ta, Manny MUA, Tati Westbrook
+4. INSTAGRAM INFLUENCERS - @hudabeauty, @jamescharles, @nikkietutorials, @jackieaina, @hyram, @patrickta, @mannymua733, @gothamista
+
+Extract:
+- Official brand pricing and product claims
+- Editorial quotes and reviews from beauty experts
+- YouTube review videos and Instagram posts with opinions and critiques
+
+Return complete JSON with brand, editorial, YouTube and Instagram data."""
+
+
+def build_nonretail_prompts(product_name: str) -> Tuple[str, str]:
+    """
+    Build the (system, user) prompts for the combined brand/editorial + influencer chunk
+    """
+    system_prompt = _NONRETAIL_SYSTEM_PROMPT
+
+    user_prompt = _NONRETAIL_USER_PROMPT_TEMPLATE.format(product_name=product_name)
+
+    return system_prompt, user_prompt
+
+
+async def fetch_nonretail_chunk(product_name: str) -> Tuple[Dict, Dict]:
+    """
+    Fetch brand/editorial and influencer content in a single call
+    
+    Returns:
+        (editorial_data, influencer_data), each shaped like the output of the
+        separate fetch_brand_editorial_chunk / fetch_influencer_chunk calls
+    """
+    system_prompt, user_prompt = build_nonretail_prompts(product_name)
+    data = await _make_llm_call(system_prompt, user_prompt, max_tokens=CHUNK_MAX_TOKENS_NONRETAIL)
+    platforms = data.get("platforms") or {}
+    editorial_data = {"platforms": {k: platforms[k] for k in EDITORIAL_PLATFORMS if k in platforms}}
+    influencer_data = {"platforms": {k: platforms[k] for k in INFLUENCER_PLATFORMS if k in platforms}}
+    return editorial_data, influencer_data
+
+
+def _project_for_summary(all_platform_data: Dict) -> Dict:
+    """
+    Reduce collected chunk data to the fields the summary step actually uses.
+    
+    Per platform: URL (for citations), price amount, rating average/count, the
+    first 3 review bodies (influencer reviews carry a summary instead) and the
+    platform summary; editorial quotes are kept as-is.
+    """
+    projection = {}
+    for chunk_data in all_platform_data.values():
+        platforms = (chunk_data or {}).get("platforms") or {}
+        for name, platform in platforms.items():
+            if not isinstance(platform, dict):
+                continue
+            projected = {}
+            if platform.get("url"):
+                projected["url"] = platform["url"]
+            price = platform.get("price")
+            if isinstance(price, dict) and price.get("amount") is not None:
+                projected["price"] = price["amount"]
+            rating = platform.get("rating")
+            if isinstance(rating, dict):
+                projected["rating"] = {"average": rating.get("average"), "count": rating.get("count")}
+            reviews = [
+                review.get("body") or review.get("summary")
+                for review in (platform.get("reviews") or [])[:3]
+                if isinstance(review, dict)
+            ]
+            if reviews:
+                projected["reviews"] = reviews
+            if platform.get("quotes"):
+                projected["quotes"] = platform["quotes"]
+            if platform.get("summary"):
+                projected["summary"] = platform["summary"]
+            projection[name] = projected
+    return projection
+
+
+_SUMMARY_SYSTEM_PROMPT = r"""You are a beauty product analysis expert. Generate comprehensive summaries from provided data.
 
 CRITICAL: Return ONLY valid JSON. No markdown, no explanations, no code blocks.
 
 REQUIRED OUTPUT FORMAT - Return ONLY this JSON structure:
 {
-  "product_identity": {
-    "name": "Product Name",
-    "brand": "Brand Name",
-    "category": "Foundation",
-    "images": ["https://image1.com/product.jpg", "https://image2.com/product.jpg"]
-  },
   "specifications": {
     "size": "1.0 fl oz",
     "form": "Liquid",
@@ -269,11 +630,6 @@ REQUIRED OUTPUT FORMAT - Return ONLY this JSON structure:
       "value": 0.78
     },
     "verdict": "A high-quality foundation that delivers on coverage and longevity. Best suited for oily to combination skin types seeking professional results."
-  },
-  "citations": {
-    "Amazon": "https://amazon.com/product-page",
-    "Sephora": "https://sephora.com/product-page",
-    "Allure Review": "https://allure.com/review-article"
   }
 }
 
@@ -285,117 +641,202 @@ REQUIREMENTS:
 - Provide overall verdict considering all perspectives
 - Return complete JSON structure"""
 
-    # Prepare condensed data for analysis
-    data_summary = {
-        "retail_platforms": len(all_platform_data.get("retail", {}).get("platforms", {})),
-        "editorial_data": bool(all_platform_data.get("editorial", {}).get("platforms", {}).get("editorial")),
-        "influencer_data": len(all_platform_data.get("influencer", {}).get("platforms", {})),
-        "sample_data": str(all_platform_data)[:3000] + "..."
-    }
-
-    user_prompt = f"""Analyze all collected data for {product_name} and generate comprehensive summaries.
+_SUMMARY_USER_PROMPT_TEMPLATE = """Analyze all collected data for {product_name} and generate comprehensive summaries.
 
 PLATFORM DATA COLLECTED:
-{json.dumps(data_summary, indent=2)}
+{data_summary}
 
 FULL DATA FOR ANALYSIS:
-{json.dumps(all_platform_data, indent=2)[:4000]}...
+{platform_data}
 
 Generate:
-1. PRODUCT IDENTITY - name, brand, category, image URLs
-2. SPECIFICATIONS - technical details from all sources  
-3. MASTER SUMMARY - synthesize ALL platform insights (≤200 chars)
-4. PLATFORM INSIGHTS:
+1. SPECIFICATIONS - technical details from all sources  
+2. MASTER SUMMARY - synthesize ALL platform insights (≤200 chars)
+3. PLATFORM INSIGHTS:
    - Retail consensus from customer reviews
    - Influencer consensus from YouTube/Instagram
    - Expert consensus from editorial reviews
-5. BALANCED ANALYSIS:
+4. BALANCED ANALYSIS:
    - 3 main pros mentioned across platforms
    - 3 main cons mentioned across platforms  
    - Aspect scores (0.0-1.0) for longevity, texture, irritation, value
    - Overall verdict considering all perspectives
-6. CITATIONS - mapping source names to URLs
 
 Return complete JSON with all analysis sections."""
 
-    return _make_llm_call(system_prompt, user_prompt, max_tokens=16384)
+
+def _assemble_deterministic(product_name: str, brand: Optional[str], all_platform_data: Dict) -> Dict:
+    """
+    Build the summary sections that follow directly from the collected data.
+    
+    Product identity comes from the product itself (category via the keyword
+    detector) and citations from the platform, editorial and influencer URLs,
+    so the LLM does not have to regenerate them.
+    """
+    from adaptive_llama import detect_product_category
+
+    citations = {}
+    for chunk_data in all_platform_data.values():
+        platforms = (chunk_data or {}).get("platforms") or {}
+        for name, platform in platforms.items():
+            if not isinstance(platform, dict):
+                continue
+            label = name.replace("_", " ").title()
+            if platform.get("url"):
+                citations[label] = platform["url"]
+            for quote in platform.get("quotes") or []:
+                if isinstance(quote, dict) and quote.get("outlet") and quote.get("url"):
+                    citations.setdefault(f"{quote['outlet']} Review", quote["url"])
+            for review in platform.get("reviews") or []:
+                if isinstance(review, dict) and review.get("creator") and review.get("url"):
+                    citations.setdefault(f"{review['creator']} ({label})", review["url"])
+
+    return {
+        "product_identity": {
+            "name": product_name,
+            "brand": brand,
+            "category": detect_product_category(product_name, brand or ""),
+            "images": []
+        },
+        "citations": citations
+    }
 
 
-def _make_llm_call(system_prompt: str, user_prompt: str, max_tokens: int = 16384) -> Dict:
+async def fetch_summary_chunk(product_name: str, all_platform_data: Dict, brand: Optional[str] = None) -> Dict:
+    """
+    Generate comprehensive summaries and analysis from all collected data
+    
+    Only specifications and the review analysis come from the LLM; product
+    identity and citations are assembled locally (an LLM-provided identity
+    still takes precedence if one is returned).
+    """
+    system_prompt = _SUMMARY_SYSTEM_PROMPT
+
+    # Prepare condensed data for analysis: coverage counts plus a single
+    # compact projection of the fields the summary needs
+    data_summary = {
+        "retail_platforms": len(all_platform_data.get("retail", {}).get("platforms") or {}),
+        "editorial_data": bool(all_platform_data.get("editorial", {}).get("platforms", {}).get("editorial")),
+        "influencer_data": len(all_platform_data.get("influencer", {}).get("platforms", {}))
+    }
+
+    user_prompt = _SUMMARY_USER_PROMPT_TEMPLATE.format(
+        product_name=product_name,
+        data_summary=orjson.dumps(data_summary).decode("utf-8"),
+        platform_data=orjson.dumps(_project_for_summary(all_platform_data)).decode("utf-8")
+    )
+
+    summary_data = await _make_llm_call(system_prompt, user_prompt, max_tokens=CHUNK_MAX_TOKENS_SUMMARY)
+    return {**_assemble_deterministic(product_name, brand, all_platform_data), **summary_data}
+
+
+async def _make_llm_call(system_prompt: str, user_prompt: str, max_tokens: int = 16384) -> Dict:
     """
     Make a focused LLM call with comprehensive error handling
+    
+    Parsed responses are cached in memory and on disk for LLM_CACHE_TTL_SECS,
+    so repeating a prompt skips the API call.
     """
     try:
-        # Get API key
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
-            raise ValueError("OPENROUTER_API_KEY environment variable is required")
-
-        # Create OpenAI client
-        client = OpenAI(
-            base_url=OPENROUTER_BASE_URL,
-            api_key=api_key,
-        )
+        cache_key = _cache_key(system_prompt, user_prompt, max_tokens) if _cache_enabled() else None
+        if cache_key is not None:
+            cached_data = await _cache_get(cache_key)
+            if cached_data is not None:
+                logger.info("LLM chunk cache hit", extra={"cache_key": cache_key, "max_tokens": max_tokens})
+                return cached_data
         
-        # Make API call
-        response = client.chat.completions.create(
-            model=OPENROUTER_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            max_tokens=max_tokens,
-            temperature=0.1,  # Low temperature for consistent output
-            extra_headers={
-                "HTTP-Referer": OPENROUTER_REFERER,
-                "X-Title": OPENROUTER_TITLE,
-            }
-        )
+        client = _get_client()
+        request_limiter, token_limiter = _get_limiters()
+        est_tokens = min(_estimate_tokens(system_prompt, user_prompt, max_tokens), LLM_TPM)
         
-        raw_output = response.choices[0].message.content
+        # Make API call once both buckets have room; back off exponentially
+        # (with jitter) if the provider still answers 429 or 5xx
+        async for attempt in AsyncRetrying(
+            retry=retry_if_exception_type((RateLimitError, InternalServerError)),
+            stop=stop_after_attempt(LLM_RETRY_ATTEMPTS),
+            wait=wait_exponential(multiplier=1, max=30) + wait_random(0, 1),
+            reraise=True
+        ):
+            with attempt:
+                await token_limiter.acquire(est_tokens)
+                await request_limiter.acquire()
+                # Stream the completion so concurrent chunk calls interleave
+                # on the event loop instead of each waiting on one big response
+                stream = await client.chat.completions.create(
+                    model=OPENROUTER_MODEL,
+                    messages=[
+                        _system_message(system_prompt),
+                        {"role": "user", "content": user_prompt}
+                    ],
+                    max_tokens=max_tokens,
+                    temperature=0.1,  # Low temperature for consistent output
+                    stream=True,
+                    stream_options={"include_usage": True},
+                    extra_headers={
+                        "HTTP-Referer": OPENROUTER_REFERER,
+                        "X-Title": OPENROUTER_TITLE,
+                    }
+                )
+                buf = bytearray()
+                tokens_used = None
+                async for chunk in stream:
+                    if chunk.usage:
+                        tokens_used = chunk.usage.total_tokens
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        buf.extend(chunk.choices[0].delta.content.encode("utf-8"))
         
-        # Log success
-        logger.info(f"LLM chunk call successful", extra={
-            "model": OPENROUTER_MODEL,
-            "tokens_used": response.usage.total_tokens if response.usage else None,
-            "max_tokens": max_tokens,
-            "output_length": len(raw_output),
-            "prompt_type": system_prompt[:50] + "..."
-        })
+        # Log success (skip building the extra fields when INFO is disabled)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("LLM chunk call successful", extra={
+                "model": OPENROUTER_MODEL,
+                "tokens_used": tokens_used,
+                "max_tokens": max_tokens,
+                "output_length": len(buf),
+                "prompt_type": system_prompt[:50] + "..."
+            })
         
-        # Parse JSON response using existing repair utilities
-        from json_repair import safe_json_parse
-        parsed_data = safe_json_parse(raw_output, max_bytes=50000)
+        # Well-formed output is the common case; only malformed output is
+        # decoded to text and sent through the (much slower) repair utilities
+        try:
+            parsed_data = orjson.loads(buf)
+        except orjson.JSONDecodeError:
+            from json_repair import safe_json_parse
+            parsed_data = safe_json_parse(buf.decode("utf-8", errors="replace"), max_bytes=50000)
         
         if not parsed_data:
-            # Log the raw output for debugging and save to file
-            logger.error(f"Failed to parse chunk JSON response", extra={
-                "raw_output_preview": raw_output[:500] + "..." if len(raw_output) > 500 else raw_output,
-                "output_length": len(raw_output),
+            # Log the failure; the raw output preview is only built at DEBUG level
+            log_extra = {
+                "output_length": len(buf),
                 "prompt_type": system_prompt[:50] + "..."
-            })
+            }
+            if logger.isEnabledFor(logging.DEBUG):
+                log_extra["raw_output_preview"] = buf[:500].decode("utf-8", errors="replace") + ("..." if len(buf) > 500 else "")
+            logger.error("Failed to parse chunk JSON response", extra=log_extra)
             
-            # Save raw output to debug file
-            try:
-                debug_file = f"/tmp/failed_chunk_{max_tokens}.json"
-                with open(debug_file, 'w') as f:
-                    import json
-                    json.dump({
+            # Save raw output to debug file (written in the background)
+            if DEBUG_DUMP:
+                raw_output = buf.decode("utf-8", errors="replace")
+                write_debug_file(
+                    f"/tmp/failed_chunk_{max_tokens}.json",
+                    orjson.dumps({
                         "prompt_type": system_prompt[:100],
                         "raw_output": raw_output,
                         "length": len(raw_output),
                         "max_tokens": max_tokens
-                    }, f, indent=2)
-                logger.error(f"Raw chunk output saved to {debug_file}")
-            except Exception as e:
-                logger.warning(f"Could not save debug file: {e}")
+                    }, option=orjson.OPT_INDENT_2),
+                    max_tokens=max_tokens,
+                    output_length=len(raw_output)
+                )
             
             raise ValueError("Failed to parse JSON response from LLM chunk")
+        
+        if cache_key is not None:
+            await _cache_set(cache_key, parsed_data)
             
         return parsed_data
         
     except Exception as e:
-        logger.error(f"LLM chunk call failed: {e}", extra={
+        logger.error("LLM chunk call failed: %s", e, extra={
             "model": OPENROUTER_MODEL,
             "max_tokens": max_tokens,
             "error_type": type(e).__name__,
@@ -404,15 +845,16 @@ def _make_llm_call(system_prompt: str, user_prompt: str, max_tokens: int = 16384
         raise
 
 
-def fetch_product_snapshot_chunked(product_name: str, brand: Optional[str] = None) -> Dict:
+async def fetch_product_snapshot_chunked_async(product_name: str, brand: Optional[str] = None) -> Dict:
     """
     Fetch complete product snapshot using chunked API calls.
     
     This approach guarantees complete data by making focused calls:
     1. Retail platforms (Amazon, Sephora, Ulta, Walmart, Nordstrom) 
-    2. Brand website + Editorial content
-    3. Influencer content (YouTube + Instagram)
-    4. Summary generation and analysis
+    2. Brand website + Editorial content + Influencer content (YouTube + Instagram)
+    3. Summary generation and analysis
+    
+    Calls 1-2 are independent and run concurrently; the summary waits on both.
     
     Args:
         product_name: Name of the product to aggregate
@@ -422,68 +864,61 @@ def fetch_product_snapshot_chunked(product_name: str, brand: Optional[str] = Non
         Complete product data dictionary
     """
     try:
-        logger.info(f"Starting chunked data collection for: {product_name}")
-        
-        # Step 1: Fetch retail platform data (5 platforms)
-        logger.info("Fetching retail platform data...")
-        retail_data = fetch_retail_chunk(product_name)
+        logger.info("Starting chunked data collection for: %s", product_name)
         
-        # Step 2: Fetch brand + editorial data  
-        logger.info("Fetching brand and editorial data...")
-        editorial_data = fetch_brand_editorial_chunk(product_name)
+        # Fail fast on a missing API key before fanning out the chunk calls
+        _get_client()
         
-        # Step 3: Fetch influencer data
-        logger.info("Fetching influencer data...")
-        influencer_data = fetch_influencer_chunk(product_name)
+        # Steps 1-2: Fetch retail and brand/editorial/influencer data concurrently
+        logger.info("Fetching retail, editorial and influencer data...")
+        retail_data, (editorial_data, influencer_data) = await asyncio.gather(
+            fetch_retail_chunk(product_name),
+            fetch_nonretail_chunk(product_name)
+        )
         
-        # Step 4: Combine all platform data
+        # Step 3: Combine all platform data
         all_platform_data = {
             "retail": retail_data,
             "editorial": editorial_data, 
             "influencer": influencer_data
         }
         
-        # Step 5: Generate comprehensive summaries
+        # Step 4: Generate comprehensive summaries
         logger.info("Generating comprehensive analysis...")
-        summary_data = fetch_summary_chunk(product_name, all_platform_data)
+        summary_data = await fetch_summary_chunk(product_name, all_platform_data, brand)
         
-        # Step 6: Merge all data into final structure
+        # Step 5: Merge all data into final structure, merging platform data
+        # from all chunks in one pass and dropping the per-chunk wrappers
         final_data = {
             "product_identity": summary_data.get("product_identity", {}),
-            "platforms": {},
+            "platforms": {
+                **(retail_data.get("platforms") or {}),
+                **(editorial_data.get("platforms") or {}),
+                **(influencer_data.get("platforms") or {})
+            },
             "specifications": summary_data.get("specifications", {}),
             "summarized_review": summary_data.get("summarized_review", {}),
             "citations": summary_data.get("citations", {})
         }
+        del all_platform_data, retail_data, editorial_data, influencer_data, summary_data
         
-        # Merge platform data from all chunks
-        if retail_data.get("platforms"):
-            final_data["platforms"].update(retail_data["platforms"])
-        if editorial_data.get("platforms"):
-            final_data["platforms"].update(editorial_data["platforms"])  
-        if influencer_data.get("platforms"):
-            final_data["platforms"].update(influencer_data["platforms"])
-        
-        logger.info(f"Chunked data collection completed successfully", extra={
+        logger.info("Chunked data collection completed successfully", extra={
             "platforms_collected": len(final_data["platforms"]),
-            "total_chunks": 4,
+            "total_chunks": 3,
             "product": product_name
         })
         
         # Debug: Save the final data to see what we're producing
-        import json
-        debug_file = f"/tmp/chunked_debug_{product_name.replace(' ', '_')}.json"
-        try:
-            with open(debug_file, 'w') as f:
-                json.dump(final_data, f, indent=2)
-            logger.info(f"Debug: Chunked data saved to {debug_file}")
-        except Exception as e:
-            logger.warning(f"Could not save debug file: {e}")
+        if DEBUG_DUMP:
+            write_debug_file(
+                f"/tmp/chunked_debug_{product_name.replace(' ', '_')}.json",
+                orjson.dumps(final_data, option=orjson.OPT_INDENT_2, default=str)
+            )
         
         return final_data
         
     except Exception as e:
-        logger.error(f"Chunked data collection failed: {e}", extra={
+        logger.error("Chunked data collection failed: %s", e, extra={
             "product": product_name,
             "error_type": type(e).__name__
         })
@@ -497,5 +932,82 @@ def fetch_product_snapshot_chunked(product_name: str, brand: Optional[str] = Non
         }
 
 
-# Export the main function
-__all__ = ['fetch_product_snapshot_chunked']
+async def fetch_many(products: List[str], concurrency: int = 8) -> List[Dict]:
+    """
+    Fetch chunked snapshots for many products concurrently.
+    
+    At most `concurrency` product pipelines run at once; the request/token
+    limiters still bound the underlying LLM calls.
+    
+    Args:
+        products: Product names to aggregate
+        concurrency: Maximum number of products in flight
+    
+    Returns:
+        One snapshot (or error structure / exception) per product, in input order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_one(product_name: str) -> Dict:
+        async with semaphore:
+            return await fetch_product_snapshot_chunked_async(product_name)
+
+    return await asyncio.gather(*(fetch_one(p) for p in products), return_exceptions=True)
+
+
+# Long-lived event loop (uvloop when installed) that runs coroutines for sync
+# callers on a daemon thread, so its pooled client is reused across calls
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+
+def _get_sync_loop() -> asyncio.AbstractEventLoop:
+    """Get or start the background event loop used by run_sync."""
+    global _sync_loop
+    if _sync_loop is None:
+        with _sync_loop_lock:
+            if _sync_loop is None:
+                loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="chunked-llama-loop", daemon=True).start()
+                _sync_loop = loop
+    return _sync_loop
+
+
+def _stop_sync_loop() -> None:
+    """Close the background loop's client and stop the loop, if it was started."""
+    global _sync_loop
+    with _sync_loop_lock:
+        loop, _sync_loop = _sync_loop, None
+    if loop is None:
+        return
+    try:
+        asyncio.run_coroutine_threadsafe(close_client(), loop).result(timeout=5)
+    except Exception as e:
+        logger.warning("Failed to close chunked LLM client: %s", e)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+atexit.register(_stop_sync_loop)
+
+
+def run_sync(coro: Coroutine[Any, Any, Any]) -> Any:
+    """
+    Run a coroutine to completion from synchronous code.
+    
+    Every call is scheduled on the same background loop, so sync callers
+    (including the parallel_llama worker threads) share one pooled client.
+    Safe to call from any thread other than that loop's own.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, _get_sync_loop()).result()
+
+
+def fetch_product_snapshot_chunked(product_name: str, brand: Optional[str] = None) -> Dict:
+    """
+    Synchronous wrapper around fetch_product_snapshot_chunked_async for callers
+    that are not running inside an event loop.
+    """
+    return run_sync(fetch_product_snapshot_chunked_async(product_name, brand))
+
+
+# Export the main functions
+__all__ = ['fetch_product_snapshot_chunked', 'fetch_product_snapshot_chunked_async', 'fetch_many']
@@ -4,29 +4,65 @@ Phase 3: Full implementation with idempotent upserts and helper functions.
 """
 
 import os
+import io
 import psycopg2
-import json
+import orjson
 import hashlib
-import re
-from datetime import datetime
-from psycopg2.extras import RealDictCursor, execute_values
-from typing import Optional, Dict, Any, List
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from decimal import Decimal
+from psycopg2.extras import RealDictCursor
+from psycopg2.pool import ThreadedConnectionPool
+from typing import Optional, Dict, Any, List, Tuple
 from dotenv import load_dotenv
 from models import RootSnapshot, PlatformData, EditorialBlock
 
 # Load environment variables
 load_dotenv()
 
-def convert_datetime_to_string(obj):
-    """Recursively convert datetime objects to ISO format strings."""
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    elif isinstance(obj, dict):
-        return {key: convert_datetime_to_string(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_datetime_to_string(item) for item in obj]
-    else:
-        return obj
+def _json_default(obj):
+    """Serialize types orjson does not handle natively (NUMERIC columns come back as Decimal)."""
+    if type(obj) is Decimal:
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def to_json_compatible(obj):
+    """Convert datetimes to ISO format strings (and Decimals to floats) in one C-level pass."""
+    return orjson.loads(orjson.dumps(obj, default=_json_default))
+
+# Connection pool sizing; DB_POOL_MAX also caps concurrent database users
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "16"))
+
+# Fallback parameters used when DATABASE_URL cannot be connected to
+LOCAL_DB_PARAMS = {
+    "host": "localhost",
+    "port": "5432",
+    "database": "beauty_agg",
+    "user": "postgres",
+    "password": "",  # Empty password
+}
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_lock = threading.Lock()
+# ThreadedConnectionPool raises instead of waiting when exhausted, so callers
+# queue on this semaphore for a free slot.
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+
+# Recently served consolidated products, kept as orjson bytes so every hit
+# hands back a fresh dict; store_snapshot evicts the product it writes, and
+# the TTL bounds staleness across worker processes
+CONSOLIDATED_CACHE_TTL_SECS = int(os.getenv("CONSOLIDATED_CACHE_TTL_SECS", "60"))
+CONSOLIDATED_CACHE_SIZE = 512
+_consolidated_cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+_consolidated_cache_lock = threading.Lock()
+# Bumped on every invalidation, so a read that started before a store
+# committed does not put its stale result back in the cache
+_consolidated_generations: Dict[str, int] = {}
 
 def get_db_connection():
     """
@@ -53,17 +89,103 @@ def get_db_connection():
         # If URL connection fails, try with individual parameters
         try:
             connection = psycopg2.connect(
-                host="localhost",
-                port="5432",
-                database="beauty_agg",
-                user="postgres",
-                password="",  # Empty password
-                cursor_factory=RealDictCursor
+                cursor_factory=RealDictCursor,
+                **LOCAL_DB_PARAMS
             )
             return connection
         except psycopg2.Error as e2:
             raise Exception(f"Database connection failed: {str(e)} (URL) and {str(e2)} (individual params)")
 
+def get_db_pool() -> ThreadedConnectionPool:
+    """
+    Get the process-wide connection pool, creating it on first use.
+    
+    Returns:
+        ThreadedConnectionPool handing out plain (tuple cursor) connections;
+        readers that index rows by column name ask for RealDictCursor
+        
+    Raises:
+        Exception: If the pool cannot open its initial connections
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                database_url = os.getenv("DATABASE_URL")
+                if not database_url:
+                    raise ValueError("DATABASE_URL environment variable is required")
+                try:
+                    pool = ThreadedConnectionPool(DB_POOL_MIN, DB_POOL_MAX, database_url)
+                except psycopg2.Error as e:
+                    try:
+                        pool = ThreadedConnectionPool(
+                            DB_POOL_MIN, DB_POOL_MAX, **LOCAL_DB_PARAMS
+                        )
+                    except psycopg2.Error as e2:
+                        raise Exception(f"Database connection failed: {str(e)} (URL) and {str(e2)} (individual params)")
+                ensure_platform_state(pool)
+                _pool = pool
+    return _pool
+
+PLATFORM_STATE_DDL = """
+    CREATE TABLE IF NOT EXISTS platform_state (
+        product_id UUID NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+        retailer TEXT NOT NULL,
+        reviews_digest TEXT,
+        updated_at TIMESTAMPTZ DEFAULT now(),
+        PRIMARY KEY (product_id, retailer)
+    )
+"""
+
+def ensure_platform_state(pool: ThreadedConnectionPool) -> None:
+    """
+    Create the platform_state table on databases built from an older schema.
+    
+    The snapshot statements prepared on every pooled connection reference it,
+    so a missing table would otherwise fail every store.
+    
+    Raises:
+        Exception: If the table is missing and cannot be created
+    """
+    conn = pool.getconn()
+    try:
+        with conn.cursor() as cursor:
+            # Check first so roles without CREATE on the schema can still start
+            cursor.execute("SELECT to_regclass('platform_state') IS NOT NULL")
+            if not cursor.fetchone()[0]:
+                cursor.execute(PLATFORM_STATE_DDL)
+        conn.commit()
+    except psycopg2.Error as e:
+        conn.rollback()
+        pool.closeall()
+        raise Exception(
+            f"platform_state table is missing and could not be created: {str(e)} "
+            "(apply db/schema.sql or the migration in db/README.md)"
+        )
+    finally:
+        if not pool.closed:
+            pool.putconn(conn)
+
+@contextmanager
+def pooled_conn():
+    """
+    Borrow a connection from the pool for the duration of a with block.
+    
+    The transaction is rolled back if the block raises, and the connection is
+    always returned to the pool (or discarded if it was closed underneath us).
+    """
+    pool = get_db_pool()
+    with _pool_slots:
+        conn = pool.getconn()
+        try:
+            yield conn
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            pool.putconn(conn, close=bool(conn.closed))
+
 def test_db_connection() -> bool:
     """
     Test database connection.
@@ -72,26 +194,29 @@ def test_db_connection() -> bool:
         True if connection successful, False otherwise
     """
     try:
-        conn = get_db_connection()
-        conn.close()
+        with pooled_conn() as conn:
+            conn.cursor().execute("SELECT 1")
         return True
     except Exception:
         return False
 
 # Helper functions
+USD_VARIANTS = frozenset({'USD', 'US$', '$', 'DOLLAR', 'DOLLARS'})
+KNOWN_NON_USD = frozenset({'EUR', 'GBP', 'CAD', 'AUD', 'JPY', 'CNY'})
+
+@lru_cache(maxsize=64)
 def ensure_currency_usd(currency: Optional[str]) -> Optional[str]:
     """Normalize currency to 'USD' if ambiguous."""
     if not currency:
         return None
     
     currency_upper = currency.upper()
-    usd_variants = {'USD', 'US$', '$', 'DOLLAR', 'DOLLARS'}
     
-    if currency_upper in usd_variants:
+    if currency_upper in USD_VARIANTS:
         return 'USD'
     
     # If it's clearly not USD, return as-is
-    if currency_upper in {'EUR', 'GBP', 'CAD', 'AUD', 'JPY', 'CNY'}:
+    if currency_upper in KNOWN_NON_USD:
         return currency_upper
     
     # For ambiguous cases, default to USD
@@ -103,14 +228,17 @@ def clamp_float(x: Optional[float], lo: float, hi: float) -> Optional[float]:
         return None
     return max(lo, min(hi, x))
 
+# Control characters except tab, newline and carriage return, mapped to None
+# so str.translate drops them
+_CONTROL_CHARS = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+
 def clean_text(s: Optional[str]) -> Optional[str]:
     """Strip control characters from text."""
     if not s:
         return s
     
     # Remove control characters except newlines and tabs
-    cleaned = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', s)
-    return cleaned.strip()
+    return s.translate(_CONTROL_CHARS).strip()
 
 def word_count(s: Optional[str]) -> int:
     """Count words in a string."""
@@ -122,6 +250,10 @@ def store_snapshot(product_id: str, snap: RootSnapshot, model_name: str, prompt_
     """
     Store complete product snapshot with idempotent upserts.
     
+    Rows for every table are collected across all platforms first and then
+    flushed with one prepared statement per table, so the number of
+    round-trips no longer grows with the number of platforms.
+    
     Args:
         product_id: UUID of the product
         snap: RootSnapshot data
@@ -131,144 +263,127 @@ def store_snapshot(product_id: str, snap: RootSnapshot, model_name: str, prompt_
     Returns:
         True if successful, False otherwise
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Start transaction
-        conn.autocommit = False
-        
-        # Store platform data
-        for platform_name, platform_data in snap.platforms.items():
-            if platform_name == 'editorial':
-                if isinstance(platform_data, EditorialBlock):
-                    store_editorial_data(cursor, product_id, platform_data)
-            else:
-                if isinstance(platform_data, PlatformData):
-                    store_platform_data(cursor, product_id, platform_name, platform_data)
-        
-        # Store specifications
-        store_specifications(cursor, product_id, snap.specifications)
-        
-        # Store summary
-        store_summary(cursor, product_id, snap.summarized_review, model_name, prompt_hash)
-        
-        # Commit transaction
-        conn.commit()
-        return True
+        with pooled_conn() as conn:
+            cursor = conn.cursor()
+            
+            # Start transaction
+            conn.autocommit = False
+            
+            prepare_snapshot_statements(cursor)
+            rows = new_snapshot_rows()
+            
+            # Collect platform data
+            for platform_name, platform_data in snap.platforms.items():
+                if platform_name == 'editorial':
+                    if isinstance(platform_data, EditorialBlock):
+                        store_editorial_data(rows, product_id, platform_data)
+                else:
+                    if isinstance(platform_data, PlatformData):
+                        store_platform_data(rows, product_id, platform_name, platform_data)
+            
+            # Collect specifications
+            store_specifications(rows, product_id, snap.specifications)
+            
+            # Flush all collected rows, one statement per table
+            flush_snapshot_rows(cursor, product_id, rows)
+            
+            # Store summary
+            store_summary(cursor, product_id, snap.summarized_review, model_name, prompt_hash)
+            
+            # Commit transaction
+            conn.commit()
+            invalidate_consolidated_product(product_id)
+            return True
         
     except Exception as e:
-        if conn:
-            conn.rollback()
         print(f"Error storing snapshot for product {product_id}: {str(e)}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
-def store_platform_data(cursor, product_id: str, platform: str, platform_data: PlatformData):
-    """Store platform-specific data with idempotent upserts."""
+def new_snapshot_rows() -> Dict[str, Any]:
+    """Create empty row accumulators for one snapshot."""
+    return {
+        'offers': [],
+        'price_history': [],
+        'ratings': [],
+        # Review rows grouped by retailer, so unchanged sets can be skipped
+        'reviews': {},
+        # Keyed by (key, source): ON CONFLICT DO UPDATE rejects a statement
+        # that touches the same row twice, so later values replace earlier ones.
+        # Editorial quotes carry a URL; aggregated specs leave the stored one alone.
+        'editorial_specs': {},
+        'specs': {},
+    }
+
+def store_platform_data(rows: Dict[str, Any], product_id: str, platform: str, platform_data: PlatformData):
+    """Collect platform-specific offer, price history, rating and review rows."""
     
-    # Store offers (price data)
+    # Offers (price data)
     if platform_data.price:
         price = platform_data.price
-        cursor.execute("""
-            INSERT INTO offers (product_id, retailer, price_amount, price_currency, 
-                              unit_price, availability, promo, url, scraped_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
-            ON CONFLICT (product_id, retailer) 
-            DO UPDATE SET
-                price_amount = EXCLUDED.price_amount,
-                price_currency = EXCLUDED.price_currency,
-                unit_price = EXCLUDED.unit_price,
-                availability = EXCLUDED.availability,
-                promo = EXCLUDED.promo,
-                url = EXCLUDED.url,
-                scraped_at = NOW()
-        """, (
+        currency = ensure_currency_usd(price.currency)
+        rows['offers'].append((
             product_id, platform, price.amount, 
-            ensure_currency_usd(price.currency), price.unit_price,
+            currency, price.unit_price,
             clean_text(price.availability), clean_text(price.promo), platform_data.url
         ))
         
         # Capture price history if price_amount is available
         if price.amount is not None:
-            cursor.execute("""
-                INSERT INTO price_history (product_id, retailer, price_amount, price_currency, url, day)
-                VALUES (%s, %s, %s, %s, %s, (NOW() AT TIME ZONE 'UTC')::date)
-                ON CONFLICT (product_id, retailer, day) DO NOTHING
-            """, (
-                product_id, platform, price.amount, 
-                ensure_currency_usd(price.currency), platform_data.url
+            rows['price_history'].append((
+                product_id, platform, price.amount, currency, platform_data.url
             ))
     
-    # Store ratings
+    # Ratings
     if platform_data.rating:
         rating = platform_data.rating
-        breakdown_json = json.dumps(rating.breakdown) if rating.breakdown else None
-        cursor.execute("""
-            INSERT INTO ratings (product_id, retailer, average, count, breakdown, url, scraped_at)
-            VALUES (%s, %s, %s, %s, %s, %s, NOW())
-            ON CONFLICT (product_id, retailer) 
-            DO UPDATE SET
-                average = EXCLUDED.average,
-                count = EXCLUDED.count,
-                breakdown = EXCLUDED.breakdown,
-                url = EXCLUDED.url,
-                scraped_at = NOW()
-        """, (
+        breakdown_json = orjson.dumps(rating.breakdown).decode() if rating.breakdown else None
+        rows['ratings'].append((
             product_id, platform, 
             clamp_float(rating.average, 0, 5), 
             rating.count, breakdown_json, platform_data.url
         ))
     
-    # Store reviews (delete existing, then bulk insert)
+    # Reviews (existing ones for this platform are replaced, capped at 5)
     if platform_data.reviews:
-        # Delete existing reviews for this product/platform
-        cursor.execute("""
-            DELETE FROM reviews WHERE product_id = %s AND retailer = %s
-        """, (product_id, platform))
-        
-        # Insert new reviews (capped at 5)
-        reviews_data = []
-        for review in platform_data.reviews[:5]:
-            reviews_data.append((
+        rows['reviews'][platform] = [
+            (
                 product_id, platform, clean_text(review.author),
                 clamp_float(review.rating, 0, 5) if review.rating else None,
                 clean_text(review.title), clean_text(review.body),
                 review.date, review.url
-            ))
-        
-        if reviews_data:
-            execute_values(cursor, """
-                INSERT INTO reviews (product_id, retailer, author, rating, title, body, posted_at, url)
-                VALUES %s
-            """, reviews_data)
-
-def store_editorial_data(cursor, product_id: str, editorial_block: EditorialBlock):
-    """Store editorial quotes as specifications."""
+            )
+            for review in platform_data.reviews[:5]
+        ]
+
+_OUTLET_SLUG = str.maketrans({' ': '_'})
+
+@lru_cache(maxsize=256)
+def editorial_spec_key(outlet: str) -> str:
+    """Spec key for an editorial outlet's quote; the same few outlets recur across products."""
+    return f"editorial_quote_{outlet.lower().translate(_OUTLET_SLUG)}"
+
+def store_editorial_data(rows: Dict[str, Any], product_id: str, editorial_block: EditorialBlock):
+    """Collect editorial quotes as specification rows."""
     for quote in editorial_block.quotes:
         # Store as a special specification type
-        spec_key = f"editorial_quote_{quote.outlet.lower().replace(' ', '_')}"
-        spec_value = json.dumps({
+        spec_key = editorial_spec_key(quote.outlet)
+        spec_value = orjson.dumps({
             "outlet": quote.outlet,
             "quote": clean_text(quote.quote),
             "url": quote.url
-        })
-        
-        cursor.execute("""
-            INSERT INTO specs (product_id, key, value, source, url, scraped_at)
-            VALUES (%s, %s, %s, %s, %s, NOW())
-            ON CONFLICT (product_id, key, source) 
-            DO UPDATE SET
-                value = EXCLUDED.value,
-                url = EXCLUDED.url,
-                scraped_at = NOW()
-        """, (product_id, spec_key, spec_value, "editorial", quote.url))
-
-def store_specifications(cursor, product_id: str, specs):
-    """Store product specifications with idempotent upserts."""
+        }).decode()
+        rows['editorial_specs'][(spec_key, "editorial")] = (product_id, spec_key, spec_value, "editorial", quote.url)
+
+# Spec source priority (brand > retailer > editorial) with the attribute
+# that flags each source on the specifications object
+SPEC_SOURCE_ATTRS = [
+    (source, f'{source}_source')
+    for source in ['brand_site', 'amazon', 'sephora', 'ulta', 'walmart', 'nordstrom', 'editorial']
+]
+
+def store_specifications(rows: Dict[str, Any], product_id: str, specs):
+    """Collect product specification rows."""
     spec_mappings = {
         'size': specs.size,
         'form': specs.form,
@@ -281,51 +396,114 @@ def store_specifications(cursor, product_id: str, specs):
         'awards': specs.awards
     }
     
-    # Determine source priority (brand > retailer > editorial)
-    source_priority = ['brand_site', 'amazon', 'sephora', 'ulta', 'walmart', 'nordstrom', 'editorial']
+    # Find the best source; it does not depend on the spec key
+    best_source = next(
+        (source for source, attr in SPEC_SOURCE_ATTRS if getattr(specs, attr, None)),
+        'aggregated'
+    )
     
     for spec_key, spec_value in spec_mappings.items():
         if spec_value is not None:
             # Convert lists to JSON strings
-            if isinstance(spec_value, list):
-                value_str = json.dumps(spec_value)
+            if type(spec_value) is list:
+                value_str = orjson.dumps(spec_value).decode()
             else:
                 value_str = str(spec_value)
             
             # Clean the value
             value_str = clean_text(value_str)
             
-            # Find the best source for this spec
-            best_source = None
-            for source in source_priority:
-                if hasattr(specs, f'{source}_source') and getattr(specs, f'{source}_source'):
-                    best_source = source
-                    break
-            
-            if not best_source:
-                best_source = 'aggregated'
-            
-            cursor.execute("""
-                INSERT INTO specs (product_id, key, value, source, scraped_at)
-                VALUES (%s, %s, %s, %s, NOW())
-                ON CONFLICT (product_id, key, source) 
-                DO UPDATE SET
-                    value = EXCLUDED.value,
-                    scraped_at = NOW()
-            """, (product_id, spec_key, value_str, best_source))
+            rows['specs'][(spec_key, best_source)] = (product_id, spec_key, value_str, best_source)
 
-def store_summary(cursor, product_id: str, summary, model_name: str, prompt_hash: str):
-    """Store AI-generated product summary."""
-    # Convert data for storage - pros/cons as PostgreSQL arrays
-    pros_array = summary.pros if summary.pros else None
-    cons_array = summary.cons if summary.cons else None
-    aspect_scores_json = json.dumps(summary.aspect_scores.dict()) if summary.aspect_scores else None
-    citations_json = json.dumps({})  # Will be populated from the snapshot
-    
-    cursor.execute("""
+# Write statements prepared once per pooled connection. Multi-row upserts take
+# one array per column and unnest them, so the statement text (and its cached
+# plan) is the same whatever the number of platforms.
+SNAPSHOT_STATEMENTS = {
+    'offers_upsert': """
+        PREPARE offers_upsert (uuid, text[], numeric[], text[], text[], text[], text[], text[]) AS
+        INSERT INTO offers (product_id, retailer, price_amount, price_currency, 
+                          unit_price, availability, promo, url, scraped_at)
+        SELECT $1, t.retailer, t.price_amount, t.price_currency,
+               t.unit_price, t.availability, t.promo, t.url, NOW()
+        FROM unnest($2, $3, $4, $5, $6, $7, $8)
+            AS t(retailer, price_amount, price_currency, unit_price, availability, promo, url)
+        ON CONFLICT (product_id, retailer) 
+        DO UPDATE SET
+            price_amount = EXCLUDED.price_amount,
+            price_currency = EXCLUDED.price_currency,
+            unit_price = EXCLUDED.unit_price,
+            availability = EXCLUDED.availability,
+            promo = EXCLUDED.promo,
+            url = EXCLUDED.url,
+            scraped_at = NOW()
+    """,
+    'price_history_insert': """
+        PREPARE price_history_insert (uuid, text[], numeric[], text[], text[]) AS
+        INSERT INTO price_history (product_id, retailer, price_amount, price_currency, url, day)
+        SELECT $1, t.retailer, t.price_amount, t.price_currency, t.url,
+               (NOW() AT TIME ZONE 'UTC')::date
+        FROM unnest($2, $3, $4, $5) AS t(retailer, price_amount, price_currency, url)
+        ON CONFLICT (product_id, retailer, day) DO NOTHING
+    """,
+    'ratings_upsert': """
+        PREPARE ratings_upsert (uuid, text[], numeric[], int[], jsonb[], text[]) AS
+        INSERT INTO ratings (product_id, retailer, average, count, breakdown, url, scraped_at)
+        SELECT $1, t.retailer, t.average, t.count, t.breakdown, t.url, NOW()
+        FROM unnest($2, $3, $4, $5, $6) AS t(retailer, average, count, breakdown, url)
+        ON CONFLICT (product_id, retailer) 
+        DO UPDATE SET
+            average = EXCLUDED.average,
+            count = EXCLUDED.count,
+            breakdown = EXCLUDED.breakdown,
+            url = EXCLUDED.url,
+            scraped_at = NOW()
+    """,
+    'reviews_delete': """
+        PREPARE reviews_delete (uuid, text[]) AS
+        DELETE FROM reviews WHERE product_id = $1 AND retailer = ANY($2)
+    """,
+    'reviews_digest_select': """
+        PREPARE reviews_digest_select (uuid, text[]) AS
+        SELECT retailer, reviews_digest
+        FROM platform_state
+        WHERE product_id = $1 AND retailer = ANY($2)
+    """,
+    'reviews_digest_upsert': """
+        PREPARE reviews_digest_upsert (uuid, text[], text[]) AS
+        INSERT INTO platform_state (product_id, retailer, reviews_digest, updated_at)
+        SELECT $1, t.retailer, t.reviews_digest, NOW()
+        FROM unnest($2, $3) AS t(retailer, reviews_digest)
+        ON CONFLICT (product_id, retailer)
+        DO UPDATE SET
+            reviews_digest = EXCLUDED.reviews_digest,
+            updated_at = NOW()
+    """,
+    'editorial_specs_upsert': """
+        PREPARE editorial_specs_upsert (uuid, text[], text[], text[], text[]) AS
+        INSERT INTO specs (product_id, key, value, source, url, scraped_at)
+        SELECT $1, t.key, t.value, t.source, t.url, NOW()
+        FROM unnest($2, $3, $4, $5) AS t(key, value, source, url)
+        ON CONFLICT (product_id, key, source) 
+        DO UPDATE SET
+            value = EXCLUDED.value,
+            url = EXCLUDED.url,
+            scraped_at = NOW()
+    """,
+    'specs_upsert': """
+        PREPARE specs_upsert (uuid, text[], text[], text[]) AS
+        INSERT INTO specs (product_id, key, value, source, scraped_at)
+        SELECT $1, t.key, t.value, t.source, NOW()
+        FROM unnest($2, $3, $4) AS t(key, value, source)
+        ON CONFLICT (product_id, key, source) 
+        DO UPDATE SET
+            value = EXCLUDED.value,
+            scraped_at = NOW()
+    """,
+    'summary_upsert': """
+        PREPARE summary_upsert (uuid, text[], text[], text, jsonb, jsonb, text, text) AS
         INSERT INTO summaries (product_id, pros, cons, verdict, aspect_scores, 
                              citations, model_name, prompt_hash, updated_at)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW())
+        VALUES ($1, $2, $3, $4, $5, $6, $7, $8, NOW())
         ON CONFLICT (product_id) 
         DO UPDATE SET
             pros = EXCLUDED.pros,
@@ -336,10 +514,162 @@ def store_summary(cursor, product_id: str, summary, model_name: str, prompt_hash
             model_name = EXCLUDED.model_name,
             prompt_hash = EXCLUDED.prompt_hash,
             updated_at = NOW()
-    """, (
-        product_id, pros_array, cons_array, clean_text(summary.verdict),
-        aspect_scores_json, citations_json, model_name, prompt_hash
-    ))
+    """,
+}
+
+# Connections that already hold SNAPSHOT_STATEMENTS (prepared statements live
+# for the session, so each pooled connection prepares them once)
+_prepared_conns = weakref.WeakSet()
+
+def prepare_snapshot_statements(cursor):
+    """Prepare the snapshot write statements on this cursor's connection if needed."""
+    conn = cursor.connection
+    if conn in _prepared_conns:
+        return
+    try:
+        for statement in SNAPSHOT_STATEMENTS.values():
+            cursor.execute(statement)
+    except Exception:
+        # PREPARE is not undone by a rollback, so drop whatever did get
+        # prepared; otherwise the next store on this connection would fail
+        # with "prepared statement already exists" instead of the real error
+        try:
+            conn.rollback()
+            cursor.execute("DEALLOCATE ALL")
+        except psycopg2.Error:
+            conn.close()
+        raise
+    _prepared_conns.add(conn)
+
+def row_columns(rows) -> List[list]:
+    """Transpose snapshot rows into per-column lists, dropping the leading product_id."""
+    return [list(column) for column in zip(*rows)][1:]
+
+def flush_snapshot_rows(cursor, product_id: str, rows: Dict[str, Any]):
+    """Write collected snapshot rows with one prepared statement per table."""
+    if rows['offers']:
+        cursor.execute(
+            "EXECUTE offers_upsert (%s, %s::text[], %s::numeric[], %s::text[], %s::text[], %s::text[], %s::text[], %s::text[])",
+            [product_id, *row_columns(rows['offers'])]
+        )
+    
+    if rows['price_history']:
+        cursor.execute(
+            "EXECUTE price_history_insert (%s, %s::text[], %s::numeric[], %s::text[], %s::text[])",
+            [product_id, *row_columns(rows['price_history'])]
+        )
+    
+    if rows['ratings']:
+        cursor.execute(
+            "EXECUTE ratings_upsert (%s, %s::text[], %s::numeric[], %s::int[], %s::jsonb[], %s::text[])",
+            [product_id, *row_columns(rows['ratings'])]
+        )
+    
+    # Replace reviews only for platforms whose review set actually changed
+    if rows['reviews']:
+        digests = {
+            retailer: reviews_digest(review_rows)
+            for retailer, review_rows in rows['reviews'].items()
+        }
+        cursor.execute(
+            "EXECUTE reviews_digest_select (%s, %s::text[])",
+            (product_id, list(digests))
+        )
+        stored = dict(cursor.fetchall())
+        changed = [retailer for retailer, digest in digests.items() if stored.get(retailer) != digest]
+        
+        if changed:
+            cursor.execute(
+                "EXECUTE reviews_delete (%s, %s::text[])",
+                (product_id, changed)
+            )
+            copy_reviews(cursor, [row for retailer in changed for row in rows['reviews'][retailer]])
+            cursor.execute(
+                "EXECUTE reviews_digest_upsert (%s, %s::text[], %s::text[])",
+                (product_id, changed, [digests[retailer] for retailer in changed])
+            )
+    
+    if rows['editorial_specs']:
+        cursor.execute(
+            "EXECUTE editorial_specs_upsert (%s, %s::text[], %s::text[], %s::text[], %s::text[])",
+            [product_id, *row_columns(rows['editorial_specs'].values())]
+        )
+    
+    if rows['specs']:
+        cursor.execute(
+            "EXECUTE specs_upsert (%s, %s::text[], %s::text[], %s::text[])",
+            [product_id, *row_columns(rows['specs'].values())]
+        )
+
+def reviews_digest(review_rows: List[tuple]) -> str:
+    """Content hash of one retailer's cleaned review rows."""
+    return hashlib.blake2b(orjson.dumps(review_rows), digest_size=16).hexdigest()
+
+def csv_field(value) -> str:
+    """Encode one value for COPY ... (FORMAT CSV): NULL stays unquoted, everything else is quoted."""
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+def copy_reviews(cursor, reviews_rows: List[tuple]):
+    """
+    Bulk insert review rows via COPY into a session temp table.
+    
+    COPY avoids per-row protocol overhead entirely; the staging table is
+    emptied on commit so it can be reused by later transactions on the
+    same connection.
+    """
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS reviews_stage (
+            product_id UUID,
+            retailer TEXT,
+            author TEXT,
+            rating NUMERIC(3,2),
+            title TEXT,
+            body TEXT,
+            posted_at TIMESTAMP WITH TIME ZONE,
+            url TEXT
+        ) ON COMMIT DELETE ROWS
+    """)
+    
+    buffer = io.StringIO()
+    for row in reviews_rows:
+        buffer.write(','.join(csv_field(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    
+    cursor.copy_expert("COPY reviews_stage FROM STDIN WITH (FORMAT CSV)", buffer)
+    cursor.execute("""
+        INSERT INTO reviews (product_id, retailer, author, rating, title, body, posted_at, url)
+        SELECT product_id, retailer, author, rating, title, body, posted_at, url
+        FROM reviews_stage
+    """)
+    # Rows written in this transaction must not be inserted twice if the
+    # connection flushes more snapshots before committing.
+    cursor.execute("TRUNCATE reviews_stage")
+
+def store_summary(cursor, product_id: str, summary, model_name: str, prompt_hash: str):
+    """Store AI-generated product summary."""
+    # Convert data for storage - pros/cons as PostgreSQL arrays
+    pros_array = summary.pros if summary.pros else None
+    cons_array = summary.cons if summary.cons else None
+    aspect_scores_json = orjson.dumps(summary.aspect_scores.dict()).decode() if summary.aspect_scores else None
+    citations_json = '{}'  # Will be populated from the snapshot
+    
+    cursor.execute(
+        "EXECUTE summary_upsert (%s, %s::text[], %s::text[], %s, %s::jsonb, %s::jsonb, %s, %s)",
+        (
+            product_id, pros_array, cons_array, clean_text(summary.verdict),
+            aspect_scores_json, citations_json, model_name, prompt_hash
+        )
+    )
+
+def invalidate_consolidated_product(product_id: str) -> None:
+    """Drop a product's cached consolidated data after it changes."""
+    key = str(product_id)
+    with _consolidated_cache_lock:
+        _consolidated_cache.pop(key, None)
+        _consolidated_generations[key] = _consolidated_generations.get(key, 0) + 1
 
 def get_consolidated_product(product_id: str) -> Optional[Dict[str, Any]]:
     """
@@ -351,107 +681,124 @@ def get_consolidated_product(product_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Consolidated product data dictionary or None if not found
     """
-    conn = None
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Get product info
-        cursor.execute("SELECT * FROM products WHERE id = %s", (product_id,))
-        product = cursor.fetchone()
-        if not product:
-            return None
-        
-        # Get offers by retailer
-        cursor.execute("SELECT * FROM offers WHERE product_id = %s", (product_id,))
-        offers = {}
-        for offer in cursor.fetchall():
-            offers[offer['retailer']] = {
-                'retailer': offer['retailer'],
-                'price_amount': offer['price_amount'],
-                'price_currency': offer['price_currency'],
-                'unit_price': offer['unit_price'],
-                'availability': offer['availability'],
-                'promo': offer['promo'],
-                'url': offer['url'],
-                'scraped_at': offer['scraped_at']
-            }
-        
-        # Get ratings by retailer
-        cursor.execute("SELECT * FROM ratings WHERE product_id = %s", (product_id,))
-        ratings = {}
-        for rating in cursor.fetchall():
-            ratings[rating['retailer']] = {
-                'retailer': rating['retailer'],
-                'average': rating['average'],
-                'count': rating['count'],
-                'breakdown': rating['breakdown'],
-                'url': rating['url'],
-                'scraped_at': rating['scraped_at']
-            }
-        
-        # Get reviews by retailer
-        cursor.execute("SELECT * FROM reviews WHERE product_id = %s ORDER BY retailer, inserted_at", (product_id,))
-        reviews = {}
-        for review in cursor.fetchall():
-            retailer = review['retailer']
-            if retailer not in reviews:
-                reviews[retailer] = []
-            reviews[retailer].append({
-                'author': review['author'],
-                'rating': review['rating'],
-                'title': review['title'],
-                'body': review['body'],
-                'posted_at': review['posted_at'],
-                'url': review['url'],
-                'helpful_count': review['helpful_count']
-            })
-        
-        # Get specifications
-        cursor.execute("SELECT * FROM specs WHERE product_id = %s", (product_id,))
-        specs = []
-        for spec in cursor.fetchall():
-            specs.append({
-                'key': spec['key'],
-                'value': spec['value'],
-                'source': spec['source'],
-                'url': spec['url'],
-                'scraped_at': spec['scraped_at']
-            })
-        
-        # Get summary
-        cursor.execute("SELECT * FROM summaries WHERE product_id = %s", (product_id,))
-        summary = cursor.fetchone()
-        summary_data = None
-        if summary:
-            summary_data = {
-                'pros': summary['pros'],
-                'cons': summary['cons'],
-                'verdict': summary['verdict'],
-                'aspect_scores': summary['aspect_scores'],
-                'citations': summary['citations'],
-                'model_name': summary['model_name'],
-                'updated_at': summary['updated_at']
-            }
-        
-        # Convert all datetime objects to strings for JSON serialization
-        result = {
-            'product': dict(product),
-            'offers': offers,
-            'ratings': ratings,
-            'reviews': reviews,
-            'specs': specs,
-            'summary': summary_data
-        }
+    data = get_consolidated_product_json(product_id)
+    return orjson.loads(data) if data is not None else None
+
+def get_consolidated_product_json(product_id: str) -> Optional[bytes]:
+    """
+    Retrieve consolidated product data as serialized JSON.
+    
+    The shape matches ConsolidatedProductResponse field for field, so API
+    handlers can send these bytes as-is. Results are served from an
+    in-process cache for up to CONSOLIDATED_CACHE_TTL_SECS (0 disables it).
+    
+    Args:
+        product_id: UUID of the product
         
-        return convert_datetime_to_string(result)
+    Returns:
+        JSON bytes or None if not found
+    """
+    key = str(product_id)
+    now = time.monotonic()
+    with _consolidated_cache_lock:
+        cached = _consolidated_cache.get(key)
+        if cached is not None and cached[0] > now:
+            _consolidated_cache.move_to_end(key)
+            return cached[1]
+        generation = _consolidated_generations.get(key, 0)
+    
+    try:
+        with pooled_conn() as conn:
+            cursor = conn.cursor()
+            
+            # Postgres assembles the whole response (timestamps rendered as ISO
+            # strings), so a single row crosses the wire
+            cursor.execute("""
+                SELECT json_build_object(
+                    'product', row_to_json(p),
+                    'offers', COALESCE((
+                        SELECT json_object_agg(o.retailer, json_build_object(
+                            'retailer', o.retailer,
+                            'price_amount', o.price_amount,
+                            'price_currency', o.price_currency,
+                            'unit_price', o.unit_price,
+                            'availability', o.availability,
+                            'promo', o.promo,
+                            'url', o.url,
+                            'scraped_at', o.scraped_at
+                        ))
+                        FROM offers o WHERE o.product_id = p.id
+                    ), '{}'::json),
+                    'ratings', COALESCE((
+                        SELECT json_object_agg(r.retailer, json_build_object(
+                            'retailer', r.retailer,
+                            'average', r.average,
+                            'count', r.count,
+                            'breakdown', r.breakdown,
+                            'url', r.url,
+                            'scraped_at', r.scraped_at
+                        ))
+                        FROM ratings r WHERE r.product_id = p.id
+                    ), '{}'::json),
+                    'reviews', COALESCE((
+                        SELECT json_object_agg(x.retailer, x.items ORDER BY x.retailer)
+                        FROM (
+                            SELECT rv.retailer, json_agg(json_build_object(
+                                'author', rv.author,
+                                'rating', rv.rating,
+                                'title', rv.title,
+                                'body', rv.body,
+                                'posted_at', rv.posted_at,
+                                'url', rv.url
+                            ) ORDER BY rv.inserted_at) AS items
+                            FROM reviews rv WHERE rv.product_id = p.id
+                            GROUP BY rv.retailer
+                        ) x
+                    ), '{}'::json),
+                    'specs', COALESCE((
+                        SELECT json_agg(json_build_object(
+                            'key', sp.key,
+                            'value', sp.value,
+                            'source', sp.source,
+                            'url', sp.url,
+                            'scraped_at', sp.scraped_at
+                        ))
+                        FROM specs sp WHERE sp.product_id = p.id
+                    ), '[]'::json),
+                    'summary', (
+                        SELECT json_build_object(
+                            'pros', su.pros,
+                            'cons', su.cons,
+                            'verdict', su.verdict,
+                            'aspect_scores', su.aspect_scores,
+                            'citations', su.citations,
+                            'updated_at', su.updated_at
+                        )
+                        FROM summaries su WHERE su.product_id = p.id
+                    )
+                ) AS consolidated
+                FROM products p
+                WHERE p.id = %s
+            """, (product_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            data = orjson.dumps(row[0])
+            if CONSOLIDATED_CACHE_TTL_SECS > 0:
+                with _consolidated_cache_lock:
+                    if _consolidated_generations.get(key, 0) != generation:
+                        return data
+                    _consolidated_cache[key] = (now + CONSOLIDATED_CACHE_TTL_SECS, data)
+                    _consolidated_cache.move_to_end(key)
+                    if len(_consolidated_cache) > CONSOLIDATED_CACHE_SIZE:
+                        _consolidated_cache.popitem(last=False)
+            
+            return data
         
     except Exception as e:
         print(f"Error retrieving consolidated product {product_id}: {str(e)}")
         return None
-    finally:
-        if conn:
-            conn.close()
 
 def get_all_products() -> List[Dict[str, Any]]:
     """
@@ -460,49 +807,56 @@ def get_all_products() -> List[Dict[str, Any]]:
     Returns:
         List of products with last_updated field
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT 
-                p.*,
-                GREATEST(
-                    COALESCE(MAX(o.scraped_at), '1970-01-01'),
-                    COALESCE(MAX(r.scraped_at), '1970-01-01'),
-                    COALESCE(MAX(s.updated_at), '1970-01-01')
-                ) as last_updated
-            FROM products p
-            LEFT JOIN offers o ON p.id = o.product_id
-            LEFT JOIN ratings r ON p.id = r.product_id
-            LEFT JOIN summaries s ON p.id = s.product_id
-            GROUP BY p.id, p.slug, p.name, p.brand, p.category, p.hero_image_url, p.description, p.created_at, p.updated_at
-            ORDER BY p.brand, p.name
-        """)
-        
-        products = []
-        for row in cursor.fetchall():
-            product_dict = dict(row)
-            # Convert last_updated to string if it's a datetime object
-            if 'last_updated' in product_dict and product_dict['last_updated'] is not None:
-                if hasattr(product_dict['last_updated'], 'isoformat'):
-                    product_dict['last_updated'] = product_dict['last_updated'].isoformat()
-                elif hasattr(product_dict['last_updated'], 'strftime'):
-                    product_dict['last_updated'] = product_dict['last_updated'].strftime('%Y-%m-%dT%H:%M:%SZ')
-                else:
-                    # Fallback: convert to string
-                    product_dict['last_updated'] = str(product_dict['last_updated'])
-            products.append(product_dict)
-        
-        return products
+        with pooled_conn() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            # Per-table MAX via scalar subqueries avoids joining offers x ratings
+            # x summaries per product before grouping
+            cursor.execute("""
+                SELECT 
+                    p.*,
+                    GREATEST(
+                        COALESCE((SELECT MAX(o.scraped_at) FROM offers o WHERE o.product_id = p.id), '1970-01-01'),
+                        COALESCE((SELECT MAX(r.scraped_at) FROM ratings r WHERE r.product_id = p.id), '1970-01-01'),
+                        COALESCE((SELECT MAX(s.updated_at) FROM summaries s WHERE s.product_id = p.id), '1970-01-01')
+                    ) as last_updated
+                FROM products p
+                ORDER BY p.brand, p.name
+            """)
+            
+            # last_updated (and the other timestamps) become ISO strings
+            return to_json_compatible(cursor.fetchall())
         
     except Exception as e:
         print(f"Error retrieving all products: {str(e)}")
         return []
-    finally:
-        if conn:
-            conn.close()
+
+def get_products_for_ingest() -> List[Dict[str, Any]]:
+    """
+    Retrieve the columns batch ingestion needs for every product.
+    
+    Unlike get_all_products this skips the per-product last_updated
+    subqueries, which ingestion never reads.
+    
+    Returns:
+        List of products with id, name and brand
+    """
+    try:
+        with pooled_conn() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            cursor.execute("""
+                SELECT id, name, brand
+                FROM products
+                ORDER BY brand, name
+            """)
+            
+            return [dict(row) for row in cursor.fetchall()]
+        
+    except Exception as e:
+        print(f"Error retrieving products for ingestion: {str(e)}")
+        return []
 
 def get_product_by_id(product_id: str) -> Optional[Dict[str, Any]]:
     """
@@ -514,22 +868,46 @@ def get_product_by_id(product_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Product data dictionary or None if not found
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM products WHERE id = %s", (product_id,))
-        product = cursor.fetchone()
-        
-        return dict(product) if product else None
+        with pooled_conn() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            cursor.execute("SELECT * FROM products WHERE id = %s", (product_id,))
+            product = cursor.fetchone()
+            
+            return dict(product) if product else None
         
     except Exception as e:
         print(f"Error retrieving product {product_id}: {str(e)}")
         return None
-    finally:
-        if conn:
-            conn.close()
+
+def has_fresh_snapshot(product_id: str, prompt_hash: str, max_age_secs: int) -> bool:
+    """
+    Check whether a snapshot built from the same prompt was stored recently.
+    
+    Args:
+        product_id: UUID of the product
+        prompt_hash: Hash of the prompt the new snapshot would use
+        max_age_secs: How old the stored snapshot may be
+        
+    Returns:
+        True if the product's summary carries prompt_hash and is recent enough
+    """
+    try:
+        with pooled_conn() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT 1 FROM summaries
+                WHERE product_id = %s AND prompt_hash = %s
+                AND updated_at > NOW() - %s * INTERVAL '1 second'
+            """, (product_id, prompt_hash, max_age_secs))
+            
+            return cursor.fetchone() is not None
+        
+    except Exception as e:
+        print(f"Error checking snapshot freshness for {product_id}: {str(e)}")
+        return False
 
 def get_price_history(product_id: str, retailers: Optional[List[str]] = None, days: int = 90) -> List[Dict[str, Any]]:
     """
@@ -543,38 +921,31 @@ def get_price_history(product_id: str, retailers: Optional[List[str]] = None, da
     Returns:
         List of price history records
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Build query with optional retailer filter
-        query = """
-            SELECT day, retailer, price_amount, price_currency, url
-            FROM price_history 
-            WHERE product_id = %s 
-            AND day >= (CURRENT_DATE - INTERVAL '%s days')
-        """
-        params = [product_id, days]
-        
-        if retailers:
-            placeholders = ','.join(['%s'] * len(retailers))
-            query += f" AND retailer IN ({placeholders})"
-            params.extend(retailers)
-        
-        query += " ORDER BY day ASC, retailer ASC"
-        
-        cursor.execute(query, params)
-        results = cursor.fetchall()
-        
-        return [dict(row) for row in results]
+        with pooled_conn() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            # One fixed statement for every call; a NULL retailer list disables
+            # the filter instead of changing the SQL text
+            cursor.execute("""
+                SELECT day, retailer, price_amount, price_currency, url
+                FROM price_history 
+                WHERE product_id = %(product_id)s 
+                AND day >= (CURRENT_DATE - %(days)s * INTERVAL '1 day')
+                AND (%(retailers)s::text[] IS NULL OR retailer = ANY(%(retailers)s::text[]))
+                ORDER BY day ASC, retailer ASC
+            """, {
+                'product_id': product_id,
+                'days': days,
+                'retailers': list(retailers) if retailers else None
+            })
+            results = cursor.fetchall()
+            
+            return [dict(row) for row in results]
         
     except Exception as e:
         print(f"Error retrieving price history for product {product_id}: {str(e)}")
         return []
-    finally:
-        if conn:
-            conn.close()
 
 def get_compare_data(product_ids: List[str]) -> List[Dict[str, Any]]:
     """
@@ -586,107 +957,96 @@ def get_compare_data(product_ids: List[str]) -> List[Dict[str, Any]]:
     Returns:
         List of comparison data dictionaries
     """
-    conn = None
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        if not product_ids:
-            return []
-        
-        # Build placeholders for the IN clause
-        placeholders = ','.join(['%s'] * len(product_ids))
-        
-        # Get basic product info
-        cursor.execute(f"""
-            SELECT id, slug, name, brand, hero_image_url
-            FROM products 
-            WHERE id IN ({placeholders})
-        """, product_ids)
-        
-        products = {row['id']: dict(row) for row in cursor.fetchall()}
-        
-        # Get minimum prices
-        cursor.execute(f"""
-            SELECT product_id, MIN(price_amount) as min_price
-            FROM offers 
-            WHERE product_id IN ({placeholders}) 
-            AND price_currency = 'USD' 
-            AND price_amount IS NOT NULL
-            GROUP BY product_id
-        """, product_ids)
-        
-        min_prices = {row['product_id']: row['min_price'] for row in cursor.fetchall()}
-        
-        # Get best ratings (highest count)
-        cursor.execute(f"""
-            SELECT DISTINCT ON (product_id) 
-                product_id, average, count
-            FROM ratings 
-            WHERE product_id IN ({placeholders}) 
-            AND count IS NOT NULL
-            ORDER BY product_id, count DESC
-        """, product_ids)
-        
-        best_ratings = {}
-        for row in cursor.fetchall():
-            best_ratings[row['product_id']] = {
-                'average': row['average'],
-                'count': row['count']
-            }
-        
-        # Get verdict snippets
-        cursor.execute(f"""
-            SELECT product_id, verdict
-            FROM summaries 
-            WHERE product_id IN ({placeholders})
-            AND verdict IS NOT NULL
-        """, product_ids)
-        
-        verdicts = {}
-        for row in cursor.fetchall():
-            if row['verdict']:
-                # Extract first sentence
-                first_sentence = row['verdict'].split('.')[0] + '.' if '.' in row['verdict'] else row['verdict']
-                verdicts[row['product_id']] = first_sentence[:100] + '...' if len(first_sentence) > 100 else first_sentence
-        
-        # Get key specs
-        cursor.execute(f"""
-            SELECT product_id, key, value
-            FROM specs 
-            WHERE product_id IN ({placeholders})
-            AND key IN ('size', 'form', 'finish_texture')
-        """, product_ids)
-        
-        key_specs = {}
-        for row in cursor.fetchall():
-            if row['product_id'] not in key_specs:
-                key_specs[row['product_id']] = {}
-            key_specs[row['product_id']][row['key']] = row['value']
-        
-        # Build comparison data
-        compare_data = []
-        for product_id in product_ids:
-            if product_id in products:
-                product = products[product_id]
+        with pooled_conn() as conn:
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            
+            if not product_ids:
+                return []
+            
+            # Products, minimum USD price, best rating (highest count), verdict
+            # and key specs in a single round-trip
+            cursor.execute("""
+                WITH p AS (
+                    SELECT id AS product_id, slug, name, brand, hero_image_url
+                    FROM products
+                    WHERE id = ANY(%(ids)s::uuid[])
+                ),
+                mp AS (
+                    SELECT product_id, MIN(price_amount) AS min_price
+                    FROM offers
+                    WHERE product_id = ANY(%(ids)s::uuid[])
+                    AND price_currency = 'USD'
+                    AND price_amount IS NOT NULL
+                    GROUP BY product_id
+                ),
+                br AS (
+                    SELECT DISTINCT ON (product_id)
+                        product_id, average, count
+                    FROM ratings
+                    WHERE product_id = ANY(%(ids)s::uuid[])
+                    AND count IS NOT NULL
+                    ORDER BY product_id, count DESC
+                ),
+                fs AS (
+                    -- First sentence of the verdict
+                    SELECT product_id,
+                        CASE WHEN strpos(verdict, '.') > 0
+                            THEN split_part(verdict, '.', 1) || '.'
+                            ELSE verdict
+                        END AS first_sentence
+                    FROM summaries
+                    WHERE product_id = ANY(%(ids)s::uuid[])
+                    AND verdict IS NOT NULL
+                    AND verdict <> ''
+                ),
+                v AS (
+                    SELECT product_id,
+                        CASE WHEN length(first_sentence) > 100
+                            THEN left(first_sentence, 100) || '...'
+                            ELSE first_sentence
+                        END AS verdict_snippet
+                    FROM fs
+                ),
+                ks AS (
+                    SELECT product_id, jsonb_object_agg(key, value) AS key_specs
+                    FROM specs
+                    WHERE product_id = ANY(%(ids)s::uuid[])
+                    AND key IN ('size', 'form', 'finish_texture')
+                    GROUP BY product_id
+                )
+                SELECT p.*, mp.min_price, br.average, br.count, v.verdict_snippet, ks.key_specs
+                FROM p
+                LEFT JOIN mp USING (product_id)
+                LEFT JOIN br USING (product_id)
+                LEFT JOIN v USING (product_id)
+                LEFT JOIN ks USING (product_id)
+            """, {'ids': product_ids})
+            
+            rows = {str(row['product_id']): row for row in cursor.fetchall()}
+            
+            # Build comparison data in the requested order
+            compare_data = []
+            for product_id in product_ids:
+                row = rows.get(product_id)
+                if row is None:
+                    continue
+                
                 compare_data.append({
                     'id': product_id,
-                    'slug': product['slug'],
-                    'name': product['name'],
-                    'brand': product['brand'],
-                    'hero_image_url': product['hero_image_url'],
-                    'min_price_usd': min_prices.get(product_id),
-                    'best_rating_avg': best_ratings.get(product_id, {}).get('average'),
-                    'best_rating_count': best_ratings.get(product_id, {}).get('count'),
-                    'verdict_snippet': verdicts.get(product_id),
-                    'key_specs': key_specs.get(product_id, {})
+                    'slug': row['slug'],
+                    'name': row['name'],
+                    'brand': row['brand'],
+                    'hero_image_url': row['hero_image_url'],
+                    'min_price_usd': row['min_price'],
+                    'best_rating_avg': row['average'],
+                    'best_rating_count': row['count'],
+                    'verdict_snippet': row['verdict_snippet'],
+                    'key_specs': row['key_specs'] or {}
                 })
-        
-        return compare_data
+            
+            return compare_data
         
     except Exception as e:
         print(f"Error retrieving comparison data: {str(e)}")
         return []
-    finally:
-        if conn:
-            conn.close()
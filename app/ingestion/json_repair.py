@@ -7,6 +7,39 @@ import json
 import re
 from typing import Dict, Optional
 
+import orjson
+
+# One decoder shared by every parse; raw_decode parses a JSON value starting
+# at any offset and reports where it ended
+_DECODER = json.JSONDecoder()
+
+# Control characters (\x00-\x1F, \x7F) for bytes.translate to delete; these
+# byte values never occur inside multi-byte UTF-8 sequences
+_CTRL_BYTES = bytes(range(0x20)) + b'\x7f'
+
+# Patterns compiled once at import rather than looked up in re's cache per call
+_TRAILING_COMMA_RE = re.compile(rb',\s*([}\]])')
+# Whole JSON strings (so braces inside them are skipped) or single braces.
+# String bodies use possessive runs so nothing is ever backtracked into, and
+# an unterminated string runs to the end of the text instead of failing and
+# being retried from every later quote (quadratic on truncated output).
+_JSON_TOKEN_RE = re.compile(r'"[^"\\]*+(?:\\.[^"\\]*+)*+(?:"|\\?\Z)|[{}]')
+# A complete "summary": "..." member, honouring escaped quotes in the value
+_LAST_SUMMARY_RE = re.compile(r'"summary"\s*:\s*"[^"\\]*+(?:\\.[^"\\]*+)*+"')
+
+# Appended after the last complete platform summary of truncated output
+_CLOSING_SUFFIX = (
+    # Close the platform object, then the platforms object
+    '\n    }'
+    '\n  }'
+    # Add minimal required fields to make valid JSON
+    ',\n  "specifications": {},'
+    '\n  "summarized_review": {"pros": [], "cons": [], "verdict": "Partial data - processing incomplete"},'
+    '\n  "citations": {}'
+    # Close the root object
+    '\n}'
+)
+
 
 def _repair_truncated_json(json_str: str) -> Optional[str]:
     """
@@ -14,37 +47,16 @@ def _repair_truncated_json(json_str: str) -> Optional[str]:
     and properly closing the JSON structure.
     """
     try:
-        # Find the last complete platform section
-        platforms_end = json_str.rfind('"summary"')
-        if platforms_end == -1:
+        # Find the last complete summary in one pass
+        match = None
+        for match in _LAST_SUMMARY_RE.finditer(json_str):
+            pass
+        if match is None:
             # No complete platform found
             return None
             
-        # Find the end of the last complete summary
-        summary_end = json_str.find('"', platforms_end + len('"summary": "'))
-        if summary_end == -1:
-            return None
-            
-        summary_end = json_str.find('"', summary_end + 1)  # Find closing quote
-        if summary_end == -1:
-            return None
-            
-        # Truncate at the end of the last complete platform
-        truncated = json_str[:summary_end + 1]
-        
-        # Add proper closing braces
-        # Close the platform object
-        truncated += '\n    }'
-        # Close the platforms object  
-        truncated += '\n  }'
-        # Add minimal required fields to make valid JSON
-        truncated += ',\n  "specifications": {},'
-        truncated += '\n  "summarized_review": {"pros": [], "cons": [], "verdict": "Partial data - processing incomplete"},'
-        truncated += '\n  "citations": {}'
-        # Close the root object
-        truncated += '\n}'
-        
-        return truncated
+        # Truncate at the end of the last complete platform and close it off
+        return json_str[:match.end()] + _CLOSING_SUFFIX
         
     except Exception:
         return None
@@ -56,10 +68,12 @@ def try_repair_to_json(raw: str, max_bytes: int = 300000) -> Optional[Dict]:
     
     This is a non-LLM "safe fix" that applies common JSON repair patterns:
     1. Truncate to max_bytes
-    2. Extract substring between first "{" and last "}"
+    2. Decode the object starting at the first "{" in place (prose around
+       valid JSON needs no further work); otherwise extract the substring
+       between first "{" and last "}"
     3. Remove control characters
     4. Remove trailing commas before } or ]
-    5. Attempt json.loads()
+    5. Decode the JSON
     
     Args:
         raw: Raw string output from LLM
@@ -71,23 +85,31 @@ def try_repair_to_json(raw: str, max_bytes: int = 300000) -> Optional[Dict]:
     if not raw or not isinstance(raw, str):
         return None
     
+    json_str = ''
     try:
-        # Step 1: Truncate to max_bytes
-        if len(raw.encode('utf-8')) > max_bytes:
-            # Truncate by character count to avoid cutting UTF-8 sequences
-            truncated = raw[:max_bytes]
-            # Find last complete character
-            while len(truncated.encode('utf-8')) > max_bytes:
-                truncated = truncated[:-1]
-            raw = truncated
+        # Step 1: Truncate to max_bytes. UTF-8 takes at most 4 bytes per
+        # character (exactly 1 for ASCII, an O(1) check), so most inputs are
+        # known to fit without encoding a copy just to measure it
+        if len(raw) * 4 > max_bytes and not (raw.isascii() and len(raw) <= max_bytes):
+            raw_bytes = raw.encode('utf-8')
+            if len(raw_bytes) > max_bytes:
+                # Slice the bytes once; errors='ignore' drops a partial trailing
+                # UTF-8 sequence so only complete characters remain
+                raw = raw_bytes[:max_bytes].decode('utf-8', errors='ignore')
         
-        # Step 2: Extract substring between first "{" and last "}"
+        # Step 2: Decode in place from the first "{", falling back to
+        # extracting the substring between first "{" and last "}"
         first_brace = raw.find('{')
-        last_brace = raw.rfind('}')
-        
         if first_brace == -1:
             return None
-            
+        
+        try:
+            return _DECODER.raw_decode(raw, first_brace)[0]
+        except json.JSONDecodeError:
+            pass
+        
+        last_brace = raw.rfind('}')
+        
         if last_brace == -1 or first_brace >= last_brace:
             # Handle truncated JSON - try to salvage partial data
             json_str = raw[first_brace:]
@@ -97,15 +119,19 @@ def try_repair_to_json(raw: str, max_bytes: int = 300000) -> Optional[Dict]:
         else:
             json_str = raw[first_brace:last_brace + 1]
         
+        # Steps 3-4 only touch ASCII structure, so run them on UTF-8 bytes
+        # (one byte per character to scan) and decode to str once at the end
+        json_bytes = json_str.encode('utf-8')
+        
         # Step 3: Remove control characters (\x00-\x1F, \x7F)
-        json_str = re.sub(r'[\x00-\x1F\x7F]', '', json_str)
+        json_bytes = json_bytes.translate(None, _CTRL_BYTES)
         
         # Step 4: Remove trailing commas before } or ]
         # Pattern: comma followed by optional whitespace and closing brace/bracket
-        json_str = re.sub(r',\s*([}\]])', r'\1', json_str)
+        json_bytes = _TRAILING_COMMA_RE.sub(rb'\1', json_bytes)
         
-        # Step 5: Attempt json.loads()
-        return json.loads(json_str)
+        # Step 5: Decode the JSON
+        return _DECODER.decode(json_bytes.decode('utf-8'))
         
     except (json.JSONDecodeError, UnicodeDecodeError, ValueError) as e:
         # Log the specific error for debugging
@@ -115,7 +141,7 @@ def try_repair_to_json(raw: str, max_bytes: int = 300000) -> Optional[Dict]:
             "error_type": type(e).__name__,
             "error_message": str(e),
             "input_length": len(raw),
-            "extracted_length": len(json_str) if 'json_str' in locals() else 0
+            "extracted_length": len(json_str)
         })
         return None
 
@@ -142,6 +168,42 @@ def validate_json_structure(data: Dict, required_keys: list = None) -> bool:
     return True
 
 
+def _fenced_json_candidates(text: str):
+    """
+    Yield each balanced {...} object that opens a ``` (or ```json) fence.
+    
+    Fences are located with str.find and the matching close brace with a
+    single token scan, so the cost stays linear in the input size.
+    """
+    pos = 0
+    while True:
+        fence = text.find('```', pos)
+        if fence == -1:
+            return
+        start = fence + 3
+        if text.startswith('json', start):
+            start += 4
+        while start < len(text) and text[start].isspace():
+            start += 1
+        pos = fence + 3
+        if not text.startswith('{', start):
+            continue
+        
+        depth = 0
+        for token in _JSON_TOKEN_RE.finditer(text, start):
+            if token.group() == '{':
+                depth += 1
+            elif token.group() == '}':
+                depth -= 1
+                if depth == 0:
+                    yield text[start:token.end()]
+                    pos = token.end()
+                    break
+        else:
+            # Unbalanced to the end of the text; no later fence can close it
+            return
+
+
 def extract_json_from_markdown(text: str) -> Optional[Dict]:
     """
     Extract JSON from markdown code blocks.
@@ -155,13 +217,14 @@ def extract_json_from_markdown(text: str) -> Optional[Dict]:
     if not text:
         return None
     
-    # Look for JSON in markdown code blocks
-    json_pattern = r'```(?:json)?\s*(\{.*?\})\s*```'
-    matches = re.findall(json_pattern, text, re.DOTALL)
+    # No fence at all: skip the code-block scan
+    if '```' not in text:
+        return try_repair_to_json(text)
     
-    for match in matches:
+    # Look for JSON in markdown code blocks
+    for match in _fenced_json_candidates(text):
         try:
-            return json.loads(match)
+            return _DECODER.decode(match)
         except json.JSONDecodeError:
             continue
     
@@ -183,16 +246,24 @@ def safe_json_parse(raw: str, max_bytes: int = 300000) -> Optional[Dict]:
     if not raw:
         return None
     
-    # Strategy 1: Direct JSON parse
-    try:
-        return json.loads(raw)
-    except json.JSONDecodeError:
-        pass
+    has_fence = '```' in raw
     
-    # Strategy 2: Extract from markdown
-    result = extract_json_from_markdown(raw)
-    if result:
-        return result
+    # Strategy 1: Direct JSON parse, only tried when the text looks like bare
+    # JSON so prose or fenced output does not pay for a failed parse. orjson
+    # is stricter than json (no NaN/Infinity); anything it rejects still gets
+    # the stdlib-based repair below
+    if not has_fence and raw.lstrip().startswith(('{', '[')):
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    
+    # Strategy 2: Extract from markdown (without a fence this would only
+    # repeat strategy 3)
+    if has_fence:
+        result = extract_json_from_markdown(raw)
+        if result:
+            return result
     
     # Strategy 3: JSON repair
     result = try_repair_to_json(raw, max_bytes)
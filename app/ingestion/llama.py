@@ -3,10 +3,15 @@ LlamaIndex integration with OpenRouter for beauty product data aggregation.
 """
 
 import os
+import io
 import json
 import logging
-from typing import Optional
-from openai import OpenAI
+import threading
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+import httpx
+import ijson
+from openai import OpenAI, APITimeoutError
 from llama_index.llms.openai import OpenAI as LlamaOpenAI
 from llama_index.core import Settings
 
@@ -14,6 +19,15 @@ from llama_index.core import Settings
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 OPENROUTER_MODEL = "openai/gpt-4o-mini-search-preview"
 
+# Bound each attempt instead of the SDK's 10-minute default so a stalled call
+# is abandoned and retried rather than holding a worker
+LLM_TIMEOUT_SECS = int(os.getenv("LLM_TIMEOUT_SECS", "120"))
+LLM_HTTP_TIMEOUT = httpx.Timeout(LLM_TIMEOUT_SECS, connect=5.0)
+LLM_MAX_RETRIES = 3
+# Keep-alive pool shared by every call through the cached client (sized for
+# concurrent /ingest-all workers)
+LLM_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+
 # SYSTEM_PROMPT with explicit JSON schema
 SYSTEM_PROMPT = r"""You are a cautious, citation-first web aggregator for beauty products. Use web search/browsing to collect PUBLIC data from: Amazon, Sephora, Ulta, Walmart, Nordstrom, the official brand site. For review text only, use Reddit and YouTube. 
 
@@ -91,21 +105,8 @@ CRITICAL REQUIREMENTS:
 - USD currency only, no invented data
 - Return pure JSON only (no markdown blocks)"""
 
-def build_user_prompt(product_name: str, brand: Optional[str] = None) -> str:
-    """
-    Build the user prompt template for product aggregation.
-    
-    Args:
-        product_name: Name of the product to aggregate
-        brand: Optional brand name
-    
-    Returns:
-        Formatted user prompt string
-    """
-    brand_part = f" {brand}" if brand else ""
-    brand_name = product_name.split()[0] if product_name else "brand"
-    
-    return f"""TASK: Search and aggregate live data for this beauty product.
+# User prompt template; only the product fields are filled in per request
+_USER_PROMPT_TEMPLATE = """TASK: Search and aggregate live data for this beauty product.
 
 PRODUCT: {product_name}{brand_part}
 REGION: United States (USD pricing)
@@ -172,56 +173,93 @@ EXAMPLE OUTPUT STRUCTURE:
   "citations": {{...}}
 }}"""
 
+# The template split on its product_name slots once at import, so each prompt
+# is a plain concatenation; brand_part always directly follows the first slot
+_PROMPT_HEAD, *_PROMPT_TAIL = _USER_PROMPT_TEMPLATE.format(product_name="\0", brand_part="").split("\0")
+
+def build_user_prompt(product_name: str, brand: Optional[str] = None) -> str:
+    """
+    Build the user prompt template for product aggregation.
+    
+    Args:
+        product_name: Name of the product to aggregate
+        brand: Optional brand name
+    
+    Returns:
+        Formatted user prompt string
+    """
+    brand_part = f" {brand}" if brand else ""
+    return f"{_PROMPT_HEAD}{product_name}{brand_part}{product_name.join(_PROMPT_TAIL)}"
+
+@lru_cache(maxsize=1)
+def _env_config() -> Tuple[Optional[str], str, str]:
+    """Read the OpenRouter API key, referer and title once per process."""
+    return (
+        os.getenv("OPENROUTER_API_KEY"),
+        os.getenv("OPENROUTER_REFERER", "Prism"),
+        os.getenv("OPENROUTER_TITLE", "Prism"),
+    )
+
+@lru_cache(maxsize=1)
+def _extra_headers() -> Dict[str, str]:
+    """OpenRouter attribution headers, built once and shared by both clients."""
+    _, referer, title = _env_config()
+    return {
+        "HTTP-Referer": referer,
+        "X-Title": title
+    }
+
+@lru_cache(maxsize=1)
 def get_openai_client() -> OpenAI:
     """
     Get OpenAI client configured for OpenRouter.
     
+    The client (and its connection pool) is built once per process and
+    carries the referer/title headers as defaults.
+    
     Returns:
         OpenAI client instance
     """
-    api_key = os.getenv("OPENROUTER_API_KEY")
+    api_key = _env_config()[0]
     if not api_key:
         raise ValueError("OPENROUTER_API_KEY environment variable is required")
     
-    # Get optional headers
-    referer = os.getenv("OPENROUTER_REFERER", "Prism")
-    title = os.getenv("OPENROUTER_TITLE", "Prism")
-    
-    headers = {
-        "HTTP-Referer": referer,
-        "X-Title": title
-    }
-    
     return OpenAI(
         base_url=OPENROUTER_BASE_URL,
         api_key=api_key,
-        default_headers=headers
+        default_headers=_extra_headers(),
+        timeout=LLM_HTTP_TIMEOUT,
+        max_retries=LLM_MAX_RETRIES,
+        http_client=httpx.Client(limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT)
     )
 
+def close_openai_client() -> None:
+    """Close the cached client's connection pool, if one was created."""
+    if get_openai_client.cache_info().currsize:
+        get_openai_client().close()
+        get_openai_client.cache_clear()
+
+@lru_cache(maxsize=1)
 def get_llama_llm() -> LlamaOpenAI:
     """
     Get LlamaIndex OpenAI LLM configured for OpenRouter.
     
+    Built lazily on first use (and registered as Settings.llm then) rather
+    than at import, since fetch_product_snapshot only needs the raw client.
+    
     Returns:
         LlamaIndex OpenAI LLM instance
     """
-    api_key = os.getenv("OPENROUTER_API_KEY")
+    api_key = _env_config()[0]
     if not api_key:
         raise ValueError("OPENROUTER_API_KEY environment variable is required")
     
-    # Get optional headers
-    referer = os.getenv("OPENROUTER_REFERER", "Prism")
-    title = os.getenv("OPENROUTER_TITLE", "Prism")
-    
     # Configure LlamaIndex to use OpenRouter with explicit headers
     llm = LlamaOpenAI(
         model=OPENROUTER_MODEL,
         api_key=api_key,
         api_base=OPENROUTER_BASE_URL,
-        default_headers={
-            "HTTP-Referer": referer,
-            "X-Title": title
-        }
+        default_headers=_extra_headers()
     )
     
     # Set as default LLM for LlamaIndex
@@ -229,38 +267,42 @@ def get_llama_llm() -> LlamaOpenAI:
     
     return llm
 
-def fetch_product_snapshot(product_name: str, brand: Optional[str] = None) -> str:
+def fetch_product_snapshot_streamed(
+    product_name: str,
+    brand: Optional[str] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Tuple[str, Optional[Dict]]:
     """
-    Fetch product snapshot using direct OpenAI client with OpenRouter.
+    Fetch product snapshot, parsing its JSON while the response streams in.
+    
+    Each delta is fed to an incremental ijson parser (as in adaptive_llama),
+    so parsing overlaps the transfer instead of starting after the last
+    token. If the model strays from one clean JSON object, incremental
+    parsing is abandoned and callers fall back to the repair pipeline on the
+    raw text.
     
     Args:
         product_name: Name of the product to aggregate
         brand: Optional brand name
+        cancel_event: Set by a caller that has given up waiting; the stream is
+            closed at the next delta so the worker thread is released
     
     Returns:
-        Raw JSON string response from the model
+        (raw JSON string response from the model, parsed snapshot or None)
+    
+    Raises:
+        TimeoutError: If cancel_event was set before the stream finished
+        APITimeoutError, httpx.TimeoutException: If the call timed out
     """
     try:
-        # Get API key
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
-            raise ValueError("OPENROUTER_API_KEY environment variable is required")
-        
-        # Create OpenAI client configured for OpenRouter
-        client = OpenAI(
-            api_key=api_key,
-            base_url=OPENROUTER_BASE_URL
-        )
+        # Shared OpenAI client configured for OpenRouter (headers included)
+        client = get_openai_client()
         
         # Build the prompt
         user_prompt = build_user_prompt(product_name, brand)
         
-        # Get optional headers for the request
-        referer = os.getenv("OPENROUTER_REFERER", "Prism")
-        title = os.getenv("OPENROUTER_TITLE", "Prism")
-        
-        # Make the API call with proper headers and increased token limit
-        response = client.chat.completions.create(
+        # Make the API call with increased token limit
+        stream = client.chat.completions.create(
             model=OPENROUTER_MODEL,
             messages=[
                 {"role": "system", "content": SYSTEM_PROMPT},
@@ -268,30 +310,68 @@ def fetch_product_snapshot(product_name: str, brand: Optional[str] = None) -> st
             ],
             max_tokens=16384,  # Set to 16,384 tokens as specified
             temperature=0.1,  # Low temperature for consistent structured output
-            extra_headers={
-                "HTTP-Referer": referer,
-                "X-Title": title
-            }
+            stream=True
         )
         
-        # Return the raw response text
-        return response.choices[0].message.content
+        raw_output = io.StringIO()
+        sections: Dict = {}
+        events = ijson.sendable_list()
+        parser = ijson.kvitems_coro(events, "", use_float=True)
+        
+        with stream:
+            for chunk in stream:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise TimeoutError("LLM stream cancelled by caller")
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                delta = chunk.choices[0].delta.content
+                raw_output.write(delta)
+                if parser is None:
+                    continue
+                try:
+                    parser.send(delta.encode("utf-8"))
+                except ijson.JSONError:
+                    parser = None
+                    continue
+                for key, value in events:
+                    sections[key] = value
+                del events[:]
+        
+        if parser is not None:
+            try:
+                parser.close()
+                for key, value in events:
+                    sections[key] = value
+            except ijson.JSONError:
+                parser = None
         
+        # A top-level array or scalar yields no sections; leave it to the caller
+        return raw_output.getvalue(), (sections if parser is not None and sections else None)
+        
+    except (APITimeoutError, httpx.TimeoutException, TimeoutError):
+        # Let callers map timeouts (including a read timeout mid-stream) to
+        # their llm_timeout response
+        raise
     except Exception as e:
         # Log the error and return a basic error response
         error_msg = f"Error fetching product snapshot: {str(e)}"
         logging.error(f"ERROR in fetch_product_snapshot: {error_msg}")
         
-        # Return a basic error JSON structure
-        return f'{{"error": "{error_msg}", "status": "failed"}}'
+        # Return a basic error JSON structure (escaped, so it always parses)
+        return json.dumps({"error": error_msg, "status": "failed"}), None
 
-# Initialize LlamaIndex settings on module import
-try:
-    get_llama_llm()
-    print("✅ LlamaIndex configured successfully with OpenRouter")
-except Exception as e:
-    print(f"⚠️  LlamaIndex configuration warning: {e}")
-    print("   Some features may not work until OPENROUTER_API_KEY is set")
+def fetch_product_snapshot(product_name: str, brand: Optional[str] = None) -> str:
+    """
+    Fetch product snapshot using direct OpenAI client with OpenRouter.
+    
+    Args:
+        product_name: Name of the product to aggregate
+        brand: Optional brand name
+    
+    Returns:
+        Raw JSON string response from the model
+    """
+    return fetch_product_snapshot_streamed(product_name, brand)[0]
 
 # Export functions for main.py
-__all__ = ['fetch_product_snapshot', 'SYSTEM_PROMPT', 'build_user_prompt']
+__all__ = ['fetch_product_snapshot', 'fetch_product_snapshot_streamed', 'SYSTEM_PROMPT', 'build_user_prompt']
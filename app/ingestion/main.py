@@ -1,19 +1,26 @@
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from dotenv import load_dotenv
 import os
+import sys
 import json
+import orjson
+import httpx
+import asyncio
 import hashlib
+import threading
 import time
+from contextlib import asynccontextmanager
 from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
-from llama import fetch_product_snapshot, SYSTEM_PROMPT, build_user_prompt, OPENROUTER_MODEL
-from chunked_llama import fetch_product_snapshot_chunked
+from openai import APITimeoutError
+from llama import fetch_product_snapshot, fetch_product_snapshot_streamed, SYSTEM_PROMPT, build_user_prompt, OPENROUTER_MODEL, close_openai_client, LLM_MAX_RETRIES
+from chunked_llama import fetch_product_snapshot_chunked_async, close_client as close_chunked_client
 from models import RootSnapshot, JSON_SCHEMA
-from db import get_db_connection, store_snapshot, get_consolidated_product, get_all_products, get_product_by_id, get_price_history, get_compare_data
+from db import store_snapshot, get_consolidated_product_json, get_all_products, get_product_by_id, get_price_history, get_compare_data, has_fresh_snapshot, get_products_for_ingest
 import logging
-from app_logging import configure_logging, log_request, log_ingestion_start, log_ingestion_success, log_ingestion_error, save_invalid_output
+from app_logging import configure_logging, log_request, log_ingestion_start, log_ingestion_success, log_ingestion_error, save_invalid_output, write_debug_file
 from json_repair import safe_json_parse
 
 # Load environment variables
@@ -28,7 +35,35 @@ logger = logging.getLogger(__name__)
 
 # Configuration from environment
 LLM_TIMEOUT_SECS = int(os.getenv("LLM_TIMEOUT_SECS", "120"))
+# Overall /ingest deadline: room for the client's retries, each bounded by LLM_TIMEOUT_SECS
+INGEST_LLM_DEADLINE_SECS = LLM_TIMEOUT_SECS * (LLM_MAX_RETRIES + 1)
 MAX_JSON_BYTES = int(os.getenv("MAX_JSON_BYTES", "300000"))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "8"))
+# Write /tmp debug dumps of adaptive output only when explicitly requested
+DEBUG_DUMP = bool(os.getenv("PRISM_DEBUG_DUMP"))
+# /ingest skips the LLM when the stored snapshot came from the same prompt
+# this recently; 0 disables the short-circuit
+INGEST_CACHE_TTL_SECS = int(os.getenv("INGEST_CACHE_TTL_SECS", "86400"))
+
+# Category aspects tried, in order, for each stored aspect score when adaptive
+# output is flattened into the fixed schema
+_ASPECT_FALLBACKS = {
+    "longevity": ("longevity", "durability", "effectiveness"),
+    "texture": ("texture", "blendability", "ease_of_use"),
+}
+
+# Appended to every user prompt; JSON_SCHEMA is a constant string
+_SCHEMA_SUFFIX = f"\n\nJSON Schema:\n{JSON_SCHEMA}"
+
+# sha256 state with the constant SYSTEM_PROMPT already fed in; prompt hashes
+# copy it and only hash the per-product prompt
+_SYSTEM_PROMPT_SHA256 = hashlib.sha256(SYSTEM_PROMPT.encode())
+
+def prompt_hash_for(full_prompt: str) -> str:
+    """Return sha256(SYSTEM_PROMPT + full_prompt) as hex."""
+    h = _SYSTEM_PROMPT_SHA256.copy()
+    h.update(full_prompt.encode())
+    return h.hexdigest()
 
 # Response Models for API Documentation
 class ProductListItem(BaseModel):
@@ -141,6 +176,17 @@ class NotFoundResponse(BaseModel):
     error: str = Field(..., description="Error type")
     detail: str = Field(..., description="Error details")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Release pooled OpenRouter connections on shutdown."""
+    yield
+    close_openai_client()
+    await close_chunked_client()
+    # adaptive_llama is imported lazily by its endpoint; close only if it was used
+    adaptive_llama = sys.modules.get("adaptive_llama")
+    if adaptive_llama is not None:
+        await adaptive_llama.close_clients()
+
 app = FastAPI(
     title="Prism API",
     description="Prism - Advanced AI-powered beauty intelligence platform with adaptive analysis and parallel processing",
@@ -158,7 +204,8 @@ app = FastAPI(
             "name": "health",
             "description": "Health check and system status"
         }
-    ]
+    ],
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -218,26 +265,28 @@ async def env_min():
 
 @app.post(
     "/ingest/{product_id}",
-    response_model=ConsolidatedProductResponse,
+    response_model=None,
     responses={
+        200: {"model": ConsolidatedProductResponse, "description": "Consolidated product data"},
         404: {"model": NotFoundResponse, "description": "Product not found"},
         422: {"model": ErrorResponse, "description": "Validation error"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
     },
     tags=["ingestion"]
 )
-async def ingest_product(product_id: str):
+async def ingest_product(product_id: str, force: bool = False):
     """
     Ingest data for a specific product using AI-powered aggregation.
     
     - **product_id**: UUID of the product to ingest
+    - **force**: Call the LLM even if a recent snapshot from the same prompt exists
     - **Returns**: Consolidated product data after ingestion
     """
     start_time = time.time()
     
     try:
         # Resolve product (id, name, brand); 404 if missing
-        product = get_product_by_id(product_id)
+        product = await asyncio.to_thread(get_product_by_id, product_id)
         if not product:
             raise HTTPException(
                 status_code=404, 
@@ -249,11 +298,36 @@ async def ingest_product(product_id: str):
         
         # Build USER prompt with product name/brand and include JSON_SCHEMA at the bottom
         user_prompt = build_user_prompt(product['name'], product.get('brand'))
-        full_prompt = f"{user_prompt}\n\nJSON Schema:\n{JSON_SCHEMA}"
+        full_prompt = user_prompt + _SCHEMA_SUFFIX
         
-        # Call fetch_product_snapshot() with timeout (legacy approach)
+        # Compute prompt_hash = sha256(system+user)
+        prompt_hash = prompt_hash_for(full_prompt)
+        
+        # Same prompt stored recently: the LLM would be asked the same question
+        if not force and INGEST_CACHE_TTL_SECS > 0 and await asyncio.to_thread(
+            has_fresh_snapshot, product_id, prompt_hash, INGEST_CACHE_TTL_SECS
+        ):
+            consolidated_data = await asyncio.to_thread(get_consolidated_product_json, product_id)
+            if consolidated_data:
+                logger.info(f"Reusing recent snapshot for product {product_id}")
+                log_ingestion_success(product_id, (time.time() - start_time) * 1000)
+                return Response(consolidated_data, media_type="application/json")
+        
+        # Call fetch_product_snapshot_streamed() with timeout (legacy approach); it
+        # blocks, so run it in a worker thread under an overall deadline and
+        # tell the thread to close the stream if the deadline passes
+        cancel_event = threading.Event()
         try:
-            raw_response = fetch_product_snapshot(product['name'], product.get('brand'))
+            raw_response, parsed_data = await asyncio.wait_for(
+                asyncio.to_thread(fetch_product_snapshot_streamed, product['name'], product.get('brand'), cancel_event),
+                timeout=INGEST_LLM_DEADLINE_SECS
+            )
+        except (asyncio.TimeoutError, APITimeoutError, httpx.TimeoutException):
+            cancel_event.set()
+            raise HTTPException(
+                status_code=422,
+                detail={"error": "llm_timeout", "message": "LLM timeout"}
+            )
         except Exception as e:
             if "timeout" in str(e).lower():
                 raise HTTPException(
@@ -262,8 +336,9 @@ async def ingest_product(product_id: str):
                 )
             raise
         
-        # Parse JSON with repair fallback
-        parsed_data = safe_json_parse(raw_response, MAX_JSON_BYTES)
+        # Parse JSON with repair fallback unless it already parsed while streaming
+        if parsed_data is None:
+            parsed_data = safe_json_parse(raw_response, MAX_JSON_BYTES)
         if parsed_data is None:
             # Save invalid output for debugging
             save_invalid_output(product_id, raw_response)
@@ -277,7 +352,7 @@ async def ingest_product(product_id: str):
         
         # Validate with RootSnapshot
         try:
-            validated_snapshot = RootSnapshot(**parsed_data)
+            validated_snapshot = RootSnapshot.model_validate(parsed_data)
         except Exception as e:
             # Save invalid output for debugging
             save_invalid_output(product_id, raw_response)
@@ -289,12 +364,9 @@ async def ingest_product(product_id: str):
                 }
             )
         
-        # Compute prompt_hash = sha256(system+user)
-        prompt_hash = hashlib.sha256((SYSTEM_PROMPT + full_prompt).encode()).hexdigest()
-        
         # Store snapshot
         model_name = OPENROUTER_MODEL
-        store_success = store_snapshot(product_id, validated_snapshot, model_name, prompt_hash)
+        store_success = await asyncio.to_thread(store_snapshot, product_id, validated_snapshot, model_name, prompt_hash)
         
         if not store_success:
             raise HTTPException(status_code=500, detail="Failed to store product snapshot")
@@ -304,11 +376,11 @@ async def ingest_product(product_id: str):
         log_ingestion_success(product_id, duration_ms)
         
         # Return consolidated JSON from DB
-        consolidated_data = get_consolidated_product(product_id)
+        consolidated_data = await asyncio.to_thread(get_consolidated_product_json, product_id)
         if not consolidated_data:
             raise HTTPException(status_code=500, detail="Failed to retrieve consolidated product data")
         
-        return consolidated_data
+        return Response(consolidated_data, media_type="application/json")
         
     except HTTPException:
         # Log ingestion error
@@ -324,24 +396,24 @@ async def ingest_product(product_id: str):
 
 @app.post(
     "/ingest-product-chunked/{product_id}",
-    response_model=ConsolidatedProductResponse,
+    response_model=None,
     responses={
+        200: {"model": ConsolidatedProductResponse, "description": "Consolidated product data"},
         404: {"description": "Product not found"},
         422: {"description": "Validation error or LLM timeout"},
         500: {"description": "Server error"}
     },
     summary="Ingest Product Data (Chunked Approach)",
-    description="Ingest product data using chunked API calls for guaranteed complete data. This approach makes 4 focused LLM calls to ensure no truncation and complete platform coverage."
+    description="Ingest product data using chunked API calls for guaranteed complete data. This approach makes 3 focused LLM calls to ensure no truncation and complete platform coverage."
 )
 async def ingest_product_chunked(product_id: str):
     """
     Ingest data for a specific product using chunked AI-powered aggregation.
     
-    This approach guarantees complete data by making 4 focused API calls:
+    This approach guarantees complete data by making 3 focused API calls:
     1. Retail platforms (Amazon, Sephora, Ulta, Walmart, Nordstrom)
-    2. Brand website + Editorial content  
-    3. Influencer content (YouTube + Instagram)
-    4. Summary generation and analysis
+    2. Brand website + Editorial content + Influencer content (YouTube + Instagram)
+    3. Summary generation and analysis
     
     - **product_id**: UUID of the product to ingest
     - **Returns**: Consolidated product data after ingestion
@@ -350,7 +422,7 @@ async def ingest_product_chunked(product_id: str):
     
     try:
         # Resolve product (id, name, brand); 404 if missing
-        product = get_product_by_id(product_id)
+        product = await asyncio.to_thread(get_product_by_id, product_id)
         if not product:
             raise HTTPException(
                 status_code=404, 
@@ -362,7 +434,7 @@ async def ingest_product_chunked(product_id: str):
         
         # Call chunked fetch_product_snapshot() with timeout
         try:
-            parsed_data = fetch_product_snapshot_chunked(product['name'], product.get('brand'))
+            parsed_data = await fetch_product_snapshot_chunked_async(product['name'], product.get('brand'))
             
             # Check if chunked call returned an error
             if parsed_data.get("error") or parsed_data.get("status") == "failed":
@@ -380,7 +452,7 @@ async def ingest_product_chunked(product_id: str):
         # For demo: Skip strict validation and create a basic snapshot
         # TODO: Fix schema alignment between chunked LLM output and RootSnapshot model
         try:
-            validated_snapshot = RootSnapshot(**parsed_data)
+            validated_snapshot = RootSnapshot.model_validate(parsed_data)
         except Exception as e:
             # Create a minimal valid snapshot for storage (chunked data is rich and complete)
             logger.warning(f"Schema mismatch in chunked data: {str(e)}")
@@ -394,12 +466,12 @@ async def ingest_product_chunked(product_id: str):
                 summary_data["cons"] = []
             
             # Fix platform_insights field length limits (150 chars max)
-            if "platform_insights" in summary_data:
-                insights = summary_data["platform_insights"]
-                if isinstance(insights, dict):
-                    for key, value in insights.items():
-                        if isinstance(value, str) and len(value) > 150:
-                            insights[key] = value[:147] + "..."
+            insights = summary_data.get("platform_insights")
+            if isinstance(insights, dict):
+                summary_data["platform_insights"] = {
+                    key: value[:147] + "..." if isinstance(value, str) and len(value) > 150 else value
+                    for key, value in insights.items()
+                }
             
             validated_snapshot = RootSnapshot(
                 product_identity=parsed_data.get("product_identity", {"name": product['name'], "brand": product.get('brand', ''), "category": "Beauty"}),
@@ -414,7 +486,7 @@ async def ingest_product_chunked(product_id: str):
         
         # Store snapshot
         model_name = f"{OPENROUTER_MODEL}_chunked"
-        store_success = store_snapshot(product_id, validated_snapshot, model_name, prompt_hash)
+        store_success = await asyncio.to_thread(store_snapshot, product_id, validated_snapshot, model_name, prompt_hash)
         
         if not store_success:
             raise HTTPException(status_code=500, detail="Failed to store chunked product snapshot")
@@ -424,11 +496,11 @@ async def ingest_product_chunked(product_id: str):
         log_ingestion_success(product_id, duration_ms)
         
         # Return consolidated JSON from DB
-        consolidated_data = get_consolidated_product(product_id)
+        consolidated_data = await asyncio.to_thread(get_consolidated_product_json, product_id)
         if not consolidated_data:
             raise HTTPException(status_code=500, detail="Failed to retrieve consolidated product data")
         
-        return consolidated_data
+        return Response(consolidated_data, media_type="application/json")
         
     except HTTPException:
         # Log ingestion error
@@ -444,8 +516,9 @@ async def ingest_product_chunked(product_id: str):
 
 @app.post(
     "/ingest-product-adaptive/{product_id}",
-    response_model=ConsolidatedProductResponse,
+    response_model=None,
     responses={
+        200: {"model": ConsolidatedProductResponse, "description": "Consolidated product data"},
         404: {"description": "Product not found"},
         422: {"description": "Validation error or LLM timeout"},
         500: {"description": "Server error"}
@@ -471,10 +544,10 @@ async def ingest_product_adaptive(product_id: str):
     
     try:
         # Import the adaptive function
-        from adaptive_llama import fetch_product_snapshot_adaptive
+        from adaptive_llama import fetch_product_snapshot_adaptive_async
         
         # Resolve product (id, name, brand); 404 if missing
-        product = get_product_by_id(product_id)
+        product = await asyncio.to_thread(get_product_by_id, product_id)
         if not product:
             raise HTTPException(
                 status_code=404, 
@@ -489,7 +562,7 @@ async def ingest_product_adaptive(product_id: str):
         description = product.get('description', '')
         
         # Use adaptive approach with category detection
-        parsed_data = fetch_product_snapshot_adaptive(product_name, brand, description)
+        parsed_data = await fetch_product_snapshot_adaptive_async(product_name, brand, description)
         
         if not parsed_data:
             raise HTTPException(
@@ -497,14 +570,13 @@ async def ingest_product_adaptive(product_id: str):
                 detail="No data returned from adaptive LLM analysis"
             )
         
-        # Log the raw adaptive data for inspection
-        try:
-            debug_file = f"/tmp/adaptive_debug_{product_name.replace(' ', '_')}.json"
-            with open(debug_file, 'w') as f:
-                json.dump(parsed_data, f, indent=2, default=str)
-            logger.info(f"Adaptive data saved to {debug_file}")
-        except Exception as debug_error:
-            logger.warning(f"Could not save debug file: {debug_error}")
+        # Dump the raw adaptive data for inspection (written in the background)
+        if DEBUG_DUMP:
+            write_debug_file(
+                f"/tmp/adaptive_debug_{product_id}.json",
+                orjson.dumps(parsed_data, option=orjson.OPT_INDENT_2, default=str),
+                product_id=product_id
+            )
         
         # Store the adaptive data (with flexible validation)
         try:
@@ -517,7 +589,7 @@ async def ingest_product_adaptive(product_id: str):
             
             # Try full validation first
             try:
-                validated_snapshot = RootSnapshot(**parsed_data)
+                validated_snapshot = RootSnapshot.model_validate(parsed_data)
                 logger.info("Adaptive data passed full validation")
             except Exception as validation_error:
                 # Use flexible approach for adaptive data
@@ -540,14 +612,15 @@ async def ingest_product_adaptive(product_id: str):
                     aspect_scores = summary_data["aspect_scores"]
                     category_aspects = aspect_scores.get("category_aspects", {})
                     
-                    # Map to expected schema (use first 4 category aspects)
-                    mapped_scores = {}
-                    aspect_names = list(category_aspects.keys())
-                    
-                    # Standard mapping
-                    mapped_scores["longevity"] = category_aspects.get("longevity", category_aspects.get("durability", category_aspects.get("effectiveness", 0.8)))
-                    mapped_scores["texture"] = category_aspects.get("texture", category_aspects.get("blendability", category_aspects.get("ease_of_use", 0.8)))
-                    mapped_scores["irritation"] = 1.0 - category_aspects.get("gentleness", 1.0 - category_aspects.get("irritation", 0.2))
+                    # Map to expected schema: first category aspect present per score
+                    mapped_scores = {
+                        score: next((category_aspects[a] for a in aspects if a in category_aspects), 0.8)
+                        for score, aspects in _ASPECT_FALLBACKS.items()
+                    }
+                    if "gentleness" in category_aspects:
+                        mapped_scores["irritation"] = 1.0 - category_aspects["gentleness"]
+                    else:
+                        mapped_scores["irritation"] = category_aspects.get("irritation", 0.2)
                     mapped_scores["value"] = aspect_scores.get("value_for_money", 0.8)
                     
                     summary_data["aspect_scores"] = mapped_scores
@@ -574,21 +647,20 @@ async def ingest_product_adaptive(product_id: str):
         prompt_hash = hashlib.sha256(f"ADAPTIVE_v1_{product['name']}_{detected_category}".encode()).hexdigest()
         model_name = f"{OPENROUTER_MODEL}_adaptive"
         
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            store_snapshot(cursor, product_id, validated_snapshot, model_name, prompt_hash)
-            conn.commit()
+        store_success = await asyncio.to_thread(store_snapshot, product_id, validated_snapshot, model_name, prompt_hash)
+        if not store_success:
+            raise HTTPException(status_code=500, detail="Failed to store adaptive product snapshot")
         
         # Log success
         duration_ms = (time.time() - start_time) * 1000
         logger.info(f"Adaptive ingestion completed for {product['name']} ({detected_category}) in {duration_ms:.0f}ms")
         
         # Return consolidated data
-        consolidated_data = get_consolidated_product(product_id)
+        consolidated_data = await asyncio.to_thread(get_consolidated_product_json, product_id)
         if not consolidated_data:
             raise HTTPException(status_code=404, detail="Product not found after ingestion")
         
-        return consolidated_data
+        return Response(consolidated_data, media_type="application/json")
         
     except HTTPException:
         # Log ingestion error
@@ -617,8 +689,8 @@ async def ingest_all_products():
     - **Returns**: Summary of batch ingestion results
     """
     try:
-        # Get all products
-        products = get_all_products()
+        # Get all products (id, name, brand are all the loop needs)
+        products = await asyncio.to_thread(get_products_for_ingest)
         if not products:
             return IngestAllResponse(
                 processed=0,
@@ -627,48 +699,56 @@ async def ingest_all_products():
                 success_rate="0.0%"
             )
         
-        processed = 0
-        errors = []
-        
-        for product in products:
+        def ingest_one(product: Dict[str, Any]) -> Optional[str]:
+            """Fetch, validate and store one product; returns an error message on failure."""
             try:
                 # Build prompt and fetch snapshot
                 user_prompt = build_user_prompt(product['name'], product.get('brand'))
-                full_prompt = f"{user_prompt}\n\nJSON Schema:\n{JSON_SCHEMA}"
+                full_prompt = user_prompt + _SCHEMA_SUFFIX
                 
-                raw_response = fetch_product_snapshot(product['name'], product.get('brand'))
+                raw_response, parsed_data = fetch_product_snapshot_streamed(product['name'], product.get('brand'))
                 
-                # Parse JSON with repair fallback
-                parsed_data = safe_json_parse(raw_response, MAX_JSON_BYTES)
+                # Parse JSON with repair fallback unless it already parsed while streaming
+                if parsed_data is None:
+                    parsed_data = safe_json_parse(raw_response, MAX_JSON_BYTES)
                 if parsed_data is None:
-                    error_msg = f"JSON parse failed for {product['name']}"
-                    errors.append(error_msg)
                     save_invalid_output(product['id'], raw_response)
-                    continue
+                    return f"JSON parse failed for {product['name']}"
                 
                 # Validate with RootSnapshot
                 try:
-                    validated_snapshot = RootSnapshot(**parsed_data)
+                    validated_snapshot = RootSnapshot.model_validate(parsed_data)
                     
                     # Store snapshot
-                    prompt_hash = hashlib.sha256((SYSTEM_PROMPT + full_prompt).encode()).hexdigest()
+                    prompt_hash = prompt_hash_for(full_prompt)
                     model_name = OPENROUTER_MODEL
                     
                     store_success = store_snapshot(product['id'], validated_snapshot, model_name, prompt_hash)
-                    if store_success:
-                        processed += 1
-                    else:
-                        errors.append(f"Failed to store snapshot for {product['name']}")
+                    if not store_success:
+                        return f"Failed to store snapshot for {product['name']}"
                         
                 except Exception as e:
-                    error_msg = f"Validation failed for {product['name']}: {str(e)}"
-                    errors.append(error_msg)
                     save_invalid_output(product['id'], raw_response)
+                    return f"Validation failed for {product['name']}: {str(e)}"
                     
             except Exception as e:
                 error_msg = f"Processing failed for {product['name']}: {str(e)}"
-                errors.append(error_msg)
                 logger.error(error_msg)
+                return error_msg
+            
+            return None
+        
+        # The LLM round-trip dominates, so run up to INGEST_CONCURRENCY products
+        # at once; each runs in a worker thread since the client and DB are blocking
+        semaphore = asyncio.Semaphore(INGEST_CONCURRENCY)
+        
+        async def ingest_bounded(product: Dict[str, Any]) -> Optional[str]:
+            async with semaphore:
+                return await asyncio.to_thread(ingest_one, product)
+        
+        results = await asyncio.gather(*(ingest_bounded(p) for p in products))
+        errors = [error for error in results if error is not None]
+        processed = len(products) - len(errors)
         
         success_rate = f"{(processed / len(products)) * 100:.1f}%"
         
@@ -685,8 +765,9 @@ async def ingest_all_products():
 
 @app.get(
     "/product/{product_id}",
-    response_model=ConsolidatedProductResponse,
+    response_model=None,
     responses={
+        200: {"model": ConsolidatedProductResponse, "description": "Consolidated product data"},
         404: {"model": NotFoundResponse, "description": "Product not found"},
         500: {"model": ErrorResponse, "description": "Internal server error"}
     },
@@ -701,14 +782,14 @@ async def get_product(product_id: str):
     """
     try:
         # Get consolidated product data
-        consolidated_data = get_consolidated_product(product_id)
+        consolidated_data = await asyncio.to_thread(get_consolidated_product_json, product_id)
         if not consolidated_data:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Product {product_id} not found"
             )
         
-        return consolidated_data
+        return Response(consolidated_data, media_type="application/json")
         
     except HTTPException:
         raise
@@ -731,7 +812,7 @@ async def get_products():
     - **Returns**: List of products with metadata
     """
     try:
-        products = get_all_products()
+        products = await asyncio.to_thread(get_all_products)
         return products
     except Exception as e:
         logger.error(f"Error retrieving products list: {str(e)}")
@@ -761,7 +842,7 @@ async def get_price_history_endpoint(
     """
     try:
         # Verify product exists
-        product = get_product_by_id(product_id)
+        product = await asyncio.to_thread(get_product_by_id, product_id)
         if not product:
             raise HTTPException(
                 status_code=404, 
@@ -774,7 +855,7 @@ async def get_price_history_endpoint(
             retailer_list = [r.strip() for r in retailers.split(',') if r.strip()]
         
         # Get price history
-        history_data = get_price_history(product_id, retailer_list, days)
+        history_data = await asyncio.to_thread(get_price_history, product_id, retailer_list, days)
         
         # Convert to response format
         points = []
@@ -836,7 +917,7 @@ async def compare_products(ids: str):
             )
         
         # Get comparison data
-        compare_data = get_compare_data(product_ids)
+        compare_data = await asyncio.to_thread(get_compare_data, product_ids)
         
         if len(compare_data) < 2:
             raise HTTPException(
@@ -897,8 +978,9 @@ async def test_llama():
 
 @app.post(
     "/ingest-product-parallel/{product_id}",
-    response_model=ConsolidatedProductResponse,
+    response_model=None,
     responses={
+        200: {"model": ConsolidatedProductResponse, "description": "Consolidated product data"},
         404: {"description": "Product not found"},
         422: {"description": "Validation error or LLM timeout"},
         500: {"description": "Server error"}
@@ -913,7 +995,7 @@ async def ingest_product_parallel(product_id: str):
         from parallel_llama import fetch_product_snapshot_parallel
         
         # Get product details
-        product = get_product_by_id(product_id)
+        product = await asyncio.to_thread(get_product_by_id, product_id)
         if not product:
             raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
         
@@ -942,7 +1024,7 @@ async def ingest_product_parallel(product_id: str):
         # Store the data with validation
         try:
             from models import RootSnapshot
-            validated_snapshot = RootSnapshot(**parsed_data)
+            validated_snapshot = RootSnapshot.model_validate(parsed_data)
             logger.info("✅ Parallel data passed full validation")
         except Exception as validation_error:
             logger.info(f"Using flexible validation for parallel data: {validation_error}")
@@ -974,20 +1056,19 @@ async def ingest_product_parallel(product_id: str):
         model_name = f"{OPENROUTER_MODEL}_parallel"
         
         # Store in database
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            store_snapshot(cursor, product_id, validated_snapshot, model_name, prompt_hash)
-            conn.commit()
+        store_success = await asyncio.to_thread(store_snapshot, product_id, validated_snapshot, model_name, prompt_hash)
+        if not store_success:
+            raise HTTPException(status_code=500, detail="Failed to store parallel product snapshot")
         
         duration_ms = (time.time() - start_time) * 1000
         logger.info(f"🎯 HIGH-PERFORMANCE parallel ingestion completed for {product['name']} in {duration_ms:.0f}ms")
         
         # Return consolidated data
-        consolidated_data = get_consolidated_product(product_id)
+        consolidated_data = await asyncio.to_thread(get_consolidated_product_json, product_id)
         if not consolidated_data:
             raise HTTPException(status_code=404, detail="Product not found after ingestion")
         
-        return consolidated_data
+        return Response(consolidated_data, media_type="application/json")
         
     except HTTPException:
         raise
@@ -1008,14 +1089,15 @@ async def benchmark_processing_performance(product_id: str):
         from parallel_llama import benchmark_parallel_vs_sequential
         
         # Get product details
-        product = get_product_by_id(product_id)
+        product = await asyncio.to_thread(get_product_by_id, product_id)
         if not product:
             raise HTTPException(status_code=404, detail=f"Product {product_id} not found")
         
         logger.info(f"🏁 Starting performance benchmark for: {product['name']}")
         
-        # Run benchmark
-        benchmark_results = benchmark_parallel_vs_sequential(
+        # Run benchmark (off the event loop; both paths block while they run)
+        benchmark_results = await asyncio.to_thread(
+            benchmark_parallel_vs_sequential,
             product['name'], 
             product.get('brand', '')
         )
@@ -15,6 +15,7 @@ from chunked_llama import (
     fetch_brand_editorial_chunk, 
     fetch_influencer_chunk,
     fetch_summary_chunk,
+    run_sync,
     logger
 )
 
@@ -87,7 +88,10 @@ class ParallelLLMProcessor:
                 "influencer": chunk_results.get("influencer", {})
             }
             
-            summary_data = fetch_summary_chunk(product_name, all_platform_data)
+            # Run the coroutine on a worker thread: callers may already be inside an event loop
+            summary_data = self.executor.submit(
+                run_sync, fetch_summary_chunk(product_name, all_platform_data)
+            ).result()
             summary_time = time.time() - summary_start
             logger.info(f"📋 Summary generated in {summary_time:.1f}s")
             
@@ -106,7 +110,7 @@ class ParallelLLMProcessor:
     def _fetch_retail_wrapper(self, product_name: str) -> Dict:
         """Thread-safe wrapper for retail chunk fetching."""
         try:
-            return fetch_retail_chunk(product_name)
+            return run_sync(fetch_retail_chunk(product_name))
         except Exception as e:
             logger.error(f"Retail chunk error: {str(e)}")
             return {}
@@ -114,7 +118,7 @@ class ParallelLLMProcessor:
     def _fetch_editorial_wrapper(self, product_name: str) -> Dict:
         """Thread-safe wrapper for editorial chunk fetching."""
         try:
-            return fetch_brand_editorial_chunk(product_name)
+            return run_sync(fetch_brand_editorial_chunk(product_name))
         except Exception as e:
             logger.error(f"Editorial chunk error: {str(e)}")
             return {}
@@ -122,7 +126,7 @@ class ParallelLLMProcessor:
     def _fetch_influencer_wrapper(self, product_name: str) -> Dict:
         """Thread-safe wrapper for influencer chunk fetching."""
         try:
-            return fetch_influencer_chunk(product_name)
+            return run_sync(fetch_influencer_chunk(product_name))
         except Exception as e:
             logger.error(f"Influencer chunk error: {str(e)}")
             return {}
@@ -0,0 +1,82 @@
+"""
+Semantic similarity cache for LLM responses.
+
+Stores (embedding, parsed response) pairs in per-namespace FAISS indexes so
+near-duplicate queries ("Chanel No. 5 EDP 100ml" vs "Chanel No. 5 Eau de
+Parfum") reuse a prior answer instead of paying for a full generation.
+Each namespace is persisted as a FAISS index plus a JSON sidecar of responses.
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+import orjson
+
+logger = logging.getLogger(__name__)
+
+
+class SemanticCache:
+    """Nearest-neighbour response cache keyed by embedding cosine similarity."""
+
+    def __init__(self, directory: str, dim: int, threshold: float = 0.97):
+        """
+        Args:
+            directory: Where index and sidecar files are persisted
+            dim: Embedding dimensionality
+            threshold: Minimum cosine similarity for a hit
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._namespaces: Dict[str, Tuple[faiss.Index, List[Dict]]] = {}
+
+    def _paths(self, namespace: str) -> Tuple[Path, Path]:
+        return self.directory / f"{namespace}.faiss", self.directory / f"{namespace}.json"
+
+    def _load(self, namespace: str) -> Tuple[faiss.Index, List[Dict]]:
+        """Get a namespace's index and responses, loading them from disk on first use."""
+        if namespace not in self._namespaces:
+            index_path, sidecar_path = self._paths(namespace)
+            if index_path.exists() and sidecar_path.exists():
+                index = faiss.read_index(str(index_path))
+                responses = orjson.loads(sidecar_path.read_bytes())
+            else:
+                index, responses = faiss.IndexFlatIP(self.dim), []
+            self._namespaces[namespace] = (index, responses)
+        return self._namespaces[namespace]
+
+    def _normalize(self, embedding: List[float]) -> np.ndarray:
+        vector = np.asarray([embedding], dtype="float32")
+        faiss.normalize_L2(vector)
+        return vector
+
+    def lookup(self, namespace: str, embedding: List[float]) -> Optional[Dict]:
+        """Return the closest cached response if it clears the similarity threshold."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            index, responses = self._load(namespace)
+            if index.ntotal == 0:
+                return None
+            scores, ids = index.search(vector, 1)
+            score, idx = float(scores[0][0]), int(ids[0][0])
+            if idx < 0 or score < self.threshold:
+                return None
+            logger.info("Semantic cache hit", extra={"namespace": namespace, "similarity": round(score, 4)})
+            return responses[idx]
+
+    def add(self, namespace: str, embedding: List[float], response: Dict) -> None:
+        """Insert a response and persist the namespace to disk."""
+        vector = self._normalize(embedding)
+        with self._lock:
+            index, responses = self._load(namespace)
+            index.add(vector)
+            responses.append(response)
+            index_path, sidecar_path = self._paths(namespace)
+            faiss.write_index(index, str(index_path))
+            sidecar_path.write_bytes(orjson.dumps(responses))
@@ -209,6 +209,59 @@ def test_phase3_validation():
         print(f"❌ Validation test failed: {e}")
         return False
 
+def test_phase3_json_repair():
+    """Test extraction of fenced JSON from LLM output."""
+    print("\n🔧 Testing fenced JSON extraction...")
+    
+    from json_repair import _fenced_json_candidates, extract_json_from_markdown
+    
+    # Nested objects and arrays close at the outermost brace
+    text = '```json\n{"a": {"b": {"c": 1}}, "d": [{"e": 2}]}\n```'
+    assert list(_fenced_json_candidates(text)) == ['{"a": {"b": {"c": 1}}, "d": [{"e": 2}]}']
+    assert extract_json_from_markdown(text) == {"a": {"b": {"c": 1}}, "d": [{"e": 2}]}
+    print("✅ Nested braces handled")
+    
+    # Braces (and escaped quotes) inside strings do not count
+    text = '```\n{"a": "}{", "b": "\\"}", "c": "{{"}\n```'
+    assert list(_fenced_json_candidates(text)) == ['{"a": "}{", "b": "\\"}", "c": "{{"}']
+    assert extract_json_from_markdown(text) == {"a": "}{", "b": '"}', "c": "{{"}
+    print("✅ Braces inside strings ignored")
+    
+    # Unterminated fences, objects and strings yield nothing
+    assert list(_fenced_json_candidates('intro ```json\n{"a": {"b": 1}')) == []
+    assert list(_fenced_json_candidates('```json\n{"a": "unterminated}\n```')) == []
+    assert extract_json_from_markdown('intro ```json\n{"a": {"b": 1}') is None
+    print("✅ Unterminated fences rejected")
+    
+    # Non-JSON fences are skipped; every JSON fence is a candidate
+    text = '```python\nx = 1\n```\nthen ```json\n{"ok": true}\n```\n```json\n{"b": 2}\n```'
+    assert list(_fenced_json_candidates(text)) == ['{"ok": true}', '{"b": 2}']
+    print("✅ Multiple fences scanned in order")
+    
+    return True
+
+def test_phase3_prompts():
+    """Test that the pre-split user prompt matches the template it came from."""
+    print("\n📝 Testing user prompt construction...")
+    
+    from llama import build_user_prompt, _USER_PROMPT_TEMPLATE
+    
+    cases = [
+        ("Hydrating Facial Cleanser", "CeraVe"),
+        ("Hydrating Facial Cleanser", None),
+        ("Hydrating Facial Cleanser", ""),
+        ("Serum {Limited} 50% Off", "Brand & Co"),
+    ]
+    for product_name, brand in cases:
+        expected = _USER_PROMPT_TEMPLATE.format(
+            product_name=product_name,
+            brand_part=f" {brand}" if brand else ""
+        )
+        assert build_user_prompt(product_name, brand) == expected, (product_name, brand)
+    print("✅ Prompt matches the template with and without a brand")
+    
+    return True
+
 def main():
     """Run all Phase 3 tests."""
     print("🚀 Phase 3 Testing Suite\n")
@@ -217,7 +270,9 @@ def main():
         ("Pydantic Models", test_phase3_models),
         ("Database Operations", test_phase3_database),
         ("API Endpoints", test_phase3_endpoints),
-        ("Validation & Helpers", test_phase3_validation)
+        ("Validation & Helpers", test_phase3_validation),
+        ("JSON Repair", test_phase3_json_repair),
+        ("Prompt Construction", test_phase3_prompts)
     ]
     
     passed = 0
@@ -96,6 +96,15 @@ CREATE TABLE price_history (
     UNIQUE (product_id, retailer, day)
 );
 
+-- Platform state table - per-retailer bookkeeping for idempotent re-ingests
+CREATE TABLE platform_state (
+    product_id UUID NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    retailer TEXT NOT NULL,
+    reviews_digest TEXT,         -- hash of the last stored review set
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (product_id, retailer)
+);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_products_slug ON products(slug);
 CREATE INDEX idx_products_brand ON products(brand);
@@ -104,11 +113,24 @@ CREATE INDEX idx_offers_product_id ON offers(product_id);
 CREATE INDEX idx_offers_retailer ON offers(retailer);
 CREATE INDEX idx_ratings_product_id ON ratings(product_id);
 CREATE INDEX idx_ratings_retailer ON ratings(retailer);
-CREATE INDEX idx_reviews_product_id ON reviews(product_id);
 CREATE INDEX idx_reviews_retailer ON reviews(retailer);
 CREATE INDEX idx_specs_product_id ON specs(product_id);
 CREATE INDEX idx_summaries_product_id ON summaries(product_id);
-CREATE INDEX idx_price_history_product_day ON price_history(product_id, day);
+
+-- Indexes shaped by the read paths in app/ingestion/db.py
+-- Price history window: product_id = ? AND day >= ? ORDER BY day, retailer
+CREATE INDEX idx_price_history_product_day ON price_history(product_id, day, retailer)
+    INCLUDE (price_amount, price_currency, url);
+-- Consolidated product: reviews per retailer in insertion order (also serves the
+-- per-retailer DELETE on re-ingest)
+CREATE INDEX idx_reviews_product_retailer_inserted ON reviews(product_id, retailer, inserted_at);
+-- Compare: DISTINCT ON (product_id) ... ORDER BY product_id, count DESC
+CREATE INDEX idx_ratings_product_count ON ratings(product_id, count DESC)
+    INCLUDE (average)
+    WHERE count IS NOT NULL;
+-- Compare: MIN(price_amount) per product for USD offers
+CREATE INDEX idx_offers_product_currency_price ON offers(product_id, price_currency, price_amount)
+    WHERE price_amount IS NOT NULL;
 
 -- Create updated_at trigger function
 CREATE OR REPLACE FUNCTION update_updated_at_column()